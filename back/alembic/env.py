@@ -0,0 +1,55 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import Base, engine
+from app import models  # noqa: F401  (registers tables on Base.metadata)
+from app.search import MANAGED_COLUMNS, MANAGED_TABLES
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Full-text search objects are managed by app/search.py, not the models
+    if type_ == "table" and (name in MANAGED_TABLES or name.startswith("menu_fts_")):
+        return False
+    if type_ == "column" and (obj.table.name, name) in MANAGED_COLUMNS:
+        return False
+    if type_ == "index" and name in ("ix_menu_search_vector", "ix_menu_name_trgm"):
+        return False
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=engine.dialect.name == "sqlite",
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
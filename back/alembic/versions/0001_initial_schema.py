@@ -0,0 +1,129 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+role_enum = sa.Enum("admin", "owner", "employee", "client", name="roleenum")
+order_status_enum = sa.Enum("pending", "preparing", "served", "paid", "cancelled", name="orderstatusenum")
+
+
+def upgrade():
+    op.create_table(
+        "restaurants",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("owner_name", sa.String(), nullable=False),
+        sa.Column("owner_email", sa.String(), nullable=False, unique=True),
+        sa.Column("owner_phone", sa.String()),
+        sa.Column("payment_status", sa.Boolean()),
+        sa.Column("subscription_expires_at", sa.DateTime()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_restaurants_id", "restaurants", ["id"])
+
+    op.create_table(
+        "accounts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id", ondelete="CASCADE")),
+        sa.Column("email", sa.String(), nullable=False, unique=True),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("phone", sa.String()),
+        sa.Column("role", role_enum, nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_accounts_id", "accounts", ["id"])
+
+    op.create_table(
+        "tables",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("number", sa.String(), nullable=False),
+        sa.Column("location", sa.String()),
+    )
+    op.create_index("ix_tables_id", "tables", ["id"])
+
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("table_id", sa.Integer(), sa.ForeignKey("tables.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("accounts.id", ondelete="SET NULL")),
+        sa.Column("start_time", sa.DateTime()),
+        sa.Column("end_time", sa.DateTime()),
+    )
+    op.create_index("ix_sessions_id", "sessions", ["id"])
+
+    op.create_table(
+        "menu",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("price", sa.Numeric(7, 2), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("available", sa.Boolean()),
+    )
+    op.create_index("ix_menu_id", "menu", ["id"])
+
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("table_id", sa.Integer(), sa.ForeignKey("tables.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("accounts.id", ondelete="SET NULL")),
+        sa.Column("status", order_status_enum, nullable=False),
+        sa.Column("total_amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("paid_at", sa.DateTime()),
+    )
+    op.create_index("ix_orders_id", "orders", ["id"])
+
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("menu_id", sa.Integer(), sa.ForeignKey("menu.id", ondelete="RESTRICT"), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("unit_price", sa.Numeric(8, 2), nullable=False),
+        sa.Column("special_instructions", sa.Text()),
+    )
+    op.create_index("ix_order_items_id", "order_items", ["id"])
+
+    op.create_table(
+        "payments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("payment_method", sa.String(), nullable=False),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("currency", sa.String()),
+        sa.Column("intent_id", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_payments_id", "payments", ["id"])
+    op.create_index("ix_payments_intent_id", "payments", ["intent_id"], unique=True)
+
+
+def downgrade():
+    op.drop_table("payments")
+    op.drop_table("order_items")
+    op.drop_table("orders")
+    op.drop_table("menu")
+    op.drop_table("sessions")
+    op.drop_table("tables")
+    op.drop_table("accounts")
+    op.drop_table("restaurants")
+    bind = op.get_bind()
+    order_status_enum.drop(bind, checkfirst=True)
+    role_enum.drop(bind, checkfirst=True)
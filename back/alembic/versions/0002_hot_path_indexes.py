@@ -0,0 +1,42 @@
+"""composite indexes for hot query shapes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Guest menu: restaurant_id + available, optionally category
+    op.create_index("ix_menu_restaurant_available_category", "menu",
+                    ["restaurant_id", "available", "category"])
+    # QR scan: table by restaurant and printed number
+    op.create_index("ix_tables_restaurant_number", "tables", ["restaurant_id", "number"])
+    # Active session lookup, plus a partial index over open sessions only
+    op.create_index("ix_sessions_table_end_start", "sessions", ["table_id", "end_time", "start_time"])
+    op.create_index("ix_sessions_active", "sessions", ["table_id", "start_time"],
+                    sqlite_where=sa.text("end_time IS NULL"),
+                    postgresql_where=sa.text("end_time IS NULL"))
+    # Admin listing: filter by status, keyset on (created_at, id)
+    op.create_index("ix_orders_restaurant_status_created", "orders",
+                    ["restaurant_id", "status", "created_at"])
+    op.create_index("ix_orders_restaurant_created", "orders", ["restaurant_id", "created_at", "id"])
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+    # accounts.email is already covered by its UNIQUE constraint
+
+
+def downgrade():
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_index("ix_orders_restaurant_created", table_name="orders")
+    op.drop_index("ix_orders_restaurant_status_created", table_name="orders")
+    op.drop_index("ix_sessions_active", table_name="sessions")
+    op.drop_index("ix_sessions_table_end_start", table_name="sessions")
+    op.drop_index("ix_tables_restaurant_number", table_name="tables")
+    op.drop_index("ix_menu_restaurant_available_category", table_name="menu")
@@ -0,0 +1,74 @@
+"""full-text menu search index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+SQLITE_UP = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS menu_fts USING fts5("
+    "name, description, category, content='menu', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS menu_fts_vocab USING fts5vocab(menu_fts, 'row')",
+    "CREATE TRIGGER IF NOT EXISTS menu_fts_ai AFTER INSERT ON menu BEGIN "
+    "INSERT INTO menu_fts(rowid, name, description, category) "
+    "VALUES (new.id, new.name, new.description, new.category); END",
+    "CREATE TRIGGER IF NOT EXISTS menu_fts_ad AFTER DELETE ON menu BEGIN "
+    "INSERT INTO menu_fts(menu_fts, rowid, name, description, category) "
+    "VALUES ('delete', old.id, old.name, old.description, old.category); END",
+    "CREATE TRIGGER IF NOT EXISTS menu_fts_au AFTER UPDATE ON menu BEGIN "
+    "INSERT INTO menu_fts(menu_fts, rowid, name, description, category) "
+    "VALUES ('delete', old.id, old.name, old.description, old.category); "
+    "INSERT INTO menu_fts(rowid, name, description, category) "
+    "VALUES (new.id, new.name, new.description, new.category); END",
+    "INSERT INTO menu_fts(menu_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWN = [
+    "DROP TRIGGER IF EXISTS menu_fts_au",
+    "DROP TRIGGER IF EXISTS menu_fts_ad",
+    "DROP TRIGGER IF EXISTS menu_fts_ai",
+    "DROP TABLE IF EXISTS menu_fts_vocab",
+    "DROP TABLE IF EXISTS menu_fts",
+]
+
+POSTGRES_UP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE menu ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_menu_search_vector ON menu USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_menu_name_trgm ON menu USING gin (name gin_trgm_ops)",
+]
+POSTGRES_DOWN = [
+    "DROP INDEX IF EXISTS ix_menu_name_trgm",
+    "DROP INDEX IF EXISTS ix_menu_search_vector",
+    "ALTER TABLE menu DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements):
+    for stmt in statements:
+        op.execute(stmt)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _run(SQLITE_UP)
+    elif dialect == "postgresql":
+        _run(POSTGRES_UP)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _run(SQLITE_DOWN)
+    elif dialect == "postgresql":
+        _run(POSTGRES_DOWN)
@@ -0,0 +1,40 @@
+"""transactional outbox
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+PENDING = sa.text("processed_at IS NULL AND failed_at IS NULL")
+
+
+def upgrade():
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("topic", sa.String(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("available_at", sa.DateTime(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("claim_token", sa.String()),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("processed_at", sa.DateTime()),
+        sa.Column("failed_at", sa.DateTime()),
+    )
+    op.create_index("ix_outbox_pending", "outbox", ["available_at", "id"],
+                    sqlite_where=PENDING, postgresql_where=PENDING)
+    op.create_index("ix_outbox_claim_token", "outbox", ["claim_token"])
+
+
+def downgrade():
+    op.drop_index("ix_outbox_claim_token", table_name="outbox")
+    op.drop_index("ix_outbox_pending", table_name="outbox")
+    op.drop_table("outbox")
@@ -0,0 +1,48 @@
+"""sales rollups for owner dashboards
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _counters(*names):
+    # (count, amount) pairs, all zero by default
+    cols = []
+    for count, amount in names:
+        cols.append(sa.Column(count, sa.Integer(), nullable=False, server_default="0"))
+        cols.append(sa.Column(amount, sa.Numeric(12, 2), nullable=False, server_default="0"))
+    return cols
+
+
+def upgrade():
+    op.create_table(
+        "sales_rollups",
+        sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("grain", sa.String(), primary_key=True),
+        sa.Column("bucket", sa.DateTime(), primary_key=True),
+        *_counters(("orders", "gross"), ("paid_orders", "revenue"), ("cancelled_orders", "cancelled_amount")),
+    )
+    op.create_table(
+        "item_sales_rollups",
+        sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("grain", sa.String(), primary_key=True),
+        sa.Column("bucket", sa.DateTime(), primary_key=True),
+        sa.Column("menu_id", sa.Integer(), sa.ForeignKey("menu.id", ondelete="CASCADE"), primary_key=True),
+        *_counters(("quantity", "gross"), ("paid_quantity", "revenue"), ("cancelled_quantity", "cancelled_amount")),
+    )
+    # Existing history is loaded with `python -m app.rollups rebuild`
+
+
+def downgrade():
+    op.drop_table("item_sales_rollups")
+    op.drop_table("sales_rollups")
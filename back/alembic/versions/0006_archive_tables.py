@@ -0,0 +1,72 @@
+"""archive tables for closed orders and ended sessions
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "orders_archive",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), nullable=False),
+        sa.Column("table_id", sa.Integer(), nullable=False),
+        sa.Column("session_id", sa.Integer(), nullable=False),
+        sa.Column("client_id", sa.Integer()),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("total_amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("paid_at", sa.DateTime()),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_orders_archive_restaurant_created", "orders_archive", ["restaurant_id", "created_at"])
+    op.create_table(
+        "order_items_archive",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("menu_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("unit_price", sa.Numeric(8, 2), nullable=False),
+        sa.Column("special_instructions", sa.Text()),
+    )
+    op.create_index("ix_order_items_archive_order_id", "order_items_archive", ["order_id"])
+    op.create_table(
+        "payments_archive",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("payment_method", sa.String(), nullable=False),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("currency", sa.String()),
+        sa.Column("intent_id", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_payments_archive_order_id", "payments_archive", ["order_id"])
+    op.create_table(
+        "sessions_archive",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), nullable=False),
+        sa.Column("table_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer()),
+        sa.Column("start_time", sa.DateTime()),
+        sa.Column("end_time", sa.DateTime()),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("sessions_archive")
+    op.drop_index("ix_payments_archive_order_id", table_name="payments_archive")
+    op.drop_table("payments_archive")
+    op.drop_index("ix_order_items_archive_order_id", table_name="order_items_archive")
+    op.drop_table("order_items_archive")
+    op.drop_index("ix_orders_archive_restaurant_created", table_name="orders_archive")
+    op.drop_table("orders_archive")
@@ -0,0 +1,155 @@
+"""
+Hot/cold archival of closed orders and ended sessions.
+
+Paid or cancelled orders older than ARCHIVE_AFTER_DAYS move, with their
+items and payments, into the *_archive tables; ended sessions with no hot
+orders left follow. Each batch is its own short transaction, so the hot
+tables are never locked for long. Archived orders stay readable by id.
+
+    python -m app.archive                # ARCHIVE_AFTER_DAYS
+    python -m app.archive --days 30
+
+or set ARCHIVE_INTERVAL to run it periodically inside the API.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Enum, String, and_, cast, delete, exists, func, insert, literal, select
+from sqlalchemy.orm import selectinload
+
+from . import models
+from .database import SessionLocal
+
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", 90))
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", 500))
+ARCHIVE_PAUSE = float(os.getenv("ARCHIVE_PAUSE", 0.05))  # between batches, lets foreground writes in
+ARCHIVE_INTERVAL = int(os.getenv("ARCHIVE_INTERVAL", 0))  # seconds; 0 = only via the CLI
+
+CLOSED = (models.OrderStatusEnum.paid, models.OrderStatusEnum.cancelled)
+
+orders = models.Order.__table__
+order_items = models.OrderItem.__table__
+payments = models.Payment.__table__
+sessions = models.Session.__table__
+ARCHIVES = {
+    orders: models.OrderArchive.__table__,
+    order_items: models.OrderItemArchive.__table__,
+    payments: models.PaymentArchive.__table__,
+    sessions: models.SessionArchive.__table__,
+}
+
+
+def _copy(db, source, where, archived_at: datetime) -> int:
+    # INSERT INTO <source>_archive SELECT ... FROM <source> WHERE ...
+    target = ARCHIVES[source]
+    names = [c.name for c in source.columns]
+    cols = [cast(c, String) if isinstance(c.type, Enum) else c for c in source.columns]
+    if "archived_at" in target.c:
+        names.append("archived_at")
+        cols.append(literal(archived_at, target.c.archived_at.type))
+    return db.execute(insert(target).from_select(names, select(*cols).where(where))).rowcount
+
+
+def _keeps_newest(table, key=None):
+    # SQLite hands the largest rowid out again once it is deleted; keeping
+    # the newest row of each table hot means archived ids are never reused
+    newest = select(func.max(table.c.id)).scalar_subquery()
+    if key is None:
+        return table.c.id < newest
+    return ~exists().where(table.c.order_id == key, table.c.id >= newest)
+
+
+def _pick(db, table, where, limit: int):
+    stmt = select(table.c.id).where(where).order_by(table.c.id).limit(limit)
+    if db.get_bind().dialect.name == "postgresql":
+        # Lock the batch; rows a live request holds are left for next time
+        stmt = stmt.with_for_update(skip_locked=True)
+    return db.execute(stmt).scalars().all()
+
+
+def archive_orders(db, cutoff: datetime, limit: int = ARCHIVE_BATCH) -> int:
+    """Move one batch of closed orders older than ``cutoff``; returns how many moved."""
+    closed = and_(orders.c.status.in_(CLOSED), orders.c.created_at < cutoff)
+    if db.get_bind().dialect.name == "sqlite":
+        closed = and_(closed, _keeps_newest(orders), _keeps_newest(order_items, orders.c.id),
+                      _keeps_newest(payments, orders.c.id))
+    ids = _pick(db, orders, closed, limit)
+    if not ids:
+        return 0
+    # Re-applying the predicate keeps every statement on the same rows even
+    # if a status change committed between the pick and our first write
+    batch = and_(orders.c.id.in_(ids), closed)
+    batch_ids = select(orders.c.id).where(batch)
+    now = datetime.utcnow()
+    moved = _copy(db, orders, batch, now)
+    for child in (order_items, payments):
+        _copy(db, child, child.c.order_id.in_(batch_ids), now)
+        db.execute(delete(child).where(child.c.order_id.in_(batch_ids)))
+    if db.execute(delete(orders).where(batch)).rowcount != moved:
+        db.rollback()
+        return 0
+    db.commit()
+    return moved
+
+
+def archive_sessions(db, cutoff: datetime, limit: int = ARCHIVE_BATCH) -> int:
+    """Move one batch of sessions that ended before ``cutoff`` and have no hot orders."""
+    ended = and_(
+        sessions.c.end_time.is_not(None), sessions.c.end_time < cutoff,
+        ~exists().where(orders.c.session_id == sessions.c.id),
+    )
+    if db.get_bind().dialect.name == "sqlite":
+        ended = and_(ended, _keeps_newest(sessions))
+    ids = _pick(db, sessions, ended, limit)
+    if not ids:
+        return 0
+    batch = and_(sessions.c.id.in_(ids), ended)
+    moved = _copy(db, sessions, batch, datetime.utcnow())
+    if db.execute(delete(sessions).where(batch)).rowcount != moved:
+        db.rollback()
+        return 0
+    db.commit()
+    return moved
+
+
+def run(older_than_days: float = ARCHIVE_AFTER_DAYS, limit: int = ARCHIVE_BATCH,
+        pause: float = ARCHIVE_PAUSE) -> dict:
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = {"orders": 0, "sessions": 0}
+    db = SessionLocal()
+    try:
+        for key, step in (("orders", archive_orders), ("sessions", archive_sessions)):
+            while True:
+                n = step(db, cutoff, limit)
+                moved[key] += n
+                if n < limit:
+                    break
+                time.sleep(pause)
+    finally:
+        db.close()
+    return moved
+
+
+# --- Reads ---
+def archived_order_stmt(oid: int):
+    return (
+        select(models.OrderArchive)
+        .options(selectinload(models.OrderArchive.items), selectinload(models.OrderArchive.payments))
+        .where(models.OrderArchive.id == oid)
+    )
+
+
+def get_archived_order(db, oid: int) -> Optional[models.OrderArchive]:
+    return db.execute(archived_order_stmt(oid)).scalars().first()
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--days", type=float, default=ARCHIVE_AFTER_DAYS)
+    p.add_argument("--batch", type=int, default=ARCHIVE_BATCH)
+    args = p.parse_args()
+    print(json.dumps(run(args.days, args.batch)))
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+MENU_CACHE_SIZE = int(os.getenv("MENU_CACHE_SIZE", 512))
+MENU_CACHE_TTL = float(os.getenv("MENU_CACHE_TTL", 300))
+TABLE_DIRECTORY_SIZE = int(os.getenv("TABLE_DIRECTORY_SIZE", 10000))
+TABLE_DIRECTORY_TTL = float(os.getenv("TABLE_DIRECTORY_TTL", 600))
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with an optional per-entry TTL and hit/miss counters."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[0] and entry[0] < time.monotonic()):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]):
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class RestaurantCache:
+    """
+    Per-restaurant cache of derived views (grouped menus, table directory).
+
+    Every restaurant has a version counter; writes bump the counter, which
+    orphans all cached views built against the old version. Entries are
+    shared across tenants in a single LRU so memory stays bounded.
+    """
+
+    def __init__(self, maxsize: int = MENU_CACHE_SIZE, ttl: float = MENU_CACHE_TTL):
+        self._entries = LRUCache(maxsize, ttl)
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, restaurant_id: int) -> int:
+        return self._versions.get(restaurant_id, 0)
+
+    def bump(self, restaurant_id: int) -> int:
+        with self._lock:
+            version = self._versions.get(restaurant_id, 0) + 1
+            self._versions[restaurant_id] = version
+        self._entries.discard_where(lambda k: k[0] == restaurant_id)
+        return version
+
+    def get_or_load(self, restaurant_id: int, key: Hashable, loader: Callable[[], Any]) -> Any:
+        version = self.version(restaurant_id)
+        entry = self._entries.get((restaurant_id, key))
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = loader()
+        # Only publish if no write landed while we were loading
+        if self.version(restaurant_id) == version:
+            self._entries.set((restaurant_id, key), (version, value))
+        return value
+
+    async def aget_or_load(self, restaurant_id: int, key: Hashable,
+                           loader: Callable[[], Awaitable[Any]]) -> Any:
+        version = self.version(restaurant_id)
+        entry = self._entries.get((restaurant_id, key))
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = await loader()
+        if self.version(restaurant_id) == version:
+            self._entries.set((restaurant_id, key), (version, value))
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._entries.stats()
+
+
+menu_cache = RestaurantCache()
+# QR scans: (restaurant_id, table_number) -> restaurant and table fields
+table_directory = RestaurantCache(TABLE_DIRECTORY_SIZE, TABLE_DIRECTORY_TTL)
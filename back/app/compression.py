@@ -0,0 +1,146 @@
+import gzip
+import os
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .cache import LRUCache
+from .etag import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", 256))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# Compressed bodies of ETagged responses keyed by (path, etag, encoding). ETags
+# are content hashes, so a cached menu is compressed once per version.
+compressed_bodies = LRUCache(COMPRESSION_CACHE_SIZE)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_cached(body: bytes, encoding: str, path: str, etag: Optional[str]) -> bytes:
+    if not etag or etag.startswith("W/"):
+        return compress(body, encoding)
+    key = (path, etag, encoding)
+    out = compressed_bodies.get(key)
+    if out is None:
+        out = compress(body, encoding)
+        compressed_bodies.set(key, out)
+    return out
+
+
+class CompressionMiddleware:
+    """
+    gzip / brotli for complete responses above a size threshold.
+
+    Compressed responses get their own ETag ("<hash>-gzip"), and every
+    response that could have been compressed carries Vary: Accept-Encoding,
+    so shared caches keep the representations apart. Streaming responses
+    (SSE, exports) and responses that already carry a Content-Encoding pass
+    through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = negotiate(headers.get("accept-encoding", ""))
+        responder = _CompressingResponder(send, encoding, self.minimum_size, scope["path"],
+                                          headers.get("if-none-match", ""))
+        await self.app(scope, receive, responder)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, encoding: Optional[str], minimum_size: int, path: str,
+                 if_none_match: str):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.path = path
+        self.if_none_match = if_none_match
+        self.start: Optional[Message] = None
+        self.passthrough = False
+
+    def _varies(self) -> bool:
+        # Whether this response's bytes depend on Accept-Encoding
+        headers = Headers(raw=self.start["headers"])
+        if "content-encoding" in headers:
+            return False
+        if self.start["status"] == 304:
+            return True
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+    def _eligible(self, body: bytes) -> bool:
+        if self.encoding is None or len(body) < self.minimum_size:
+            return False
+        return self.start["status"] not in (204, 206, 304)
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        self.passthrough = True
+        body = message.get("body", b"")
+        if message.get("more_body", False) or not self._varies():
+            # Streamed or never compressed: forward everything as is
+            await self.send(self.start)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if self.start["status"] == 304:
+            # Echo the tag of the representation the client holds
+            if etag and self.encoding and encoded_etag(etag, self.encoding) in self.if_none_match:
+                headers["ETag"] = encoded_etag(etag, self.encoding)
+        elif self._eligible(body):
+            body = compress_cached(body, self.encoding, self.path, etag)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+            if etag:
+                headers["ETag"] = encoded_etag(etag, self.encoding)
+            message = {"type": "http.response.body", "body": body}
+        await self.send(self.start)
+        await self.send(message)
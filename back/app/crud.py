@@ -1,15 +1,28 @@
-from typing import List, Optional, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from passlib.context import CryptContext
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from sqlalchemy.orm import Session, joinedload, object_session, selectinload
+from sqlalchemy import and_, bindparam, event, func, or_, select, update
+from sqlalchemy.exc import DBAPIError
 from jose import jwt
 import os
-from datetime import datetime
-from . import models, schemas
+import base64
+import secrets
+from datetime import datetime, timedelta
+from decimal import Decimal
+from collections import defaultdict
+from pydantic import ValidationError
+from . import archive, events, fastjson, gateway, models, outbox, rollups, schemas
+from . import outbox_handlers  # noqa: F401  (registers handlers before anything is enqueued)
+from . import search as search_index
+from .cache import LRUCache, menu_cache, table_directory
+from .etag import compute_etag, etag_for_bytes
+from .hashing import password_hasher
 
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = os.getenv("JWT_SECRET", "CHANGE_ME")
 TAX_RATE = 0.10  # 10%
+CENT = Decimal("0.01")
+GUEST_TOKEN_TTL = int(os.getenv("GUEST_TOKEN_TTL", 3600 * 12))
+# Guests created before stateless guest tokens were stored as accounts
+LEGACY_GUEST_EMAIL = "guest\\_%@qrcode"
 
 # --- Auth ---
 def get_user(db: Session, user_id: int) -> models.User:
@@ -22,7 +35,7 @@ def create_user(db: Session, name, email, password, phone, role, restaurant_id=N
     user = models.User(
         name=name,
         email=email,
-        password_hash=pwd_ctx.hash(password),
+        password_hash=password_hasher.hash(password),
         phone=phone,
         role=role,
         restaurant_id=restaurant_id,
@@ -34,7 +47,7 @@ def create_user(db: Session, name, email, password, phone, role, restaurant_id=N
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
     user = get_user_by_email(db, email)
-    if not user or not pwd_ctx.verify(password, user.password_hash):
+    if not user or not password_hasher.verify(password, user.password_hash):
         return None
     return user
 
@@ -42,6 +55,28 @@ def create_jwt(user_id: int) -> str:
     to_encode = {"user_id": user_id, "exp": datetime.utcnow().timestamp() + 3600 * 24}
     return jwt.encode(to_encode, SECRET_KEY, algorithm="HS256")
 
+def create_guest_token() -> Tuple[int, str]:
+    # Stateless guest identity: no password hash, no accounts row
+    guest_id = secrets.randbits(31)
+    to_encode = {
+        "guest_id": guest_id,
+        "role": "guest",
+        "exp": datetime.utcnow().timestamp() + GUEST_TOKEN_TTL,
+    }
+    return guest_id, jwt.encode(to_encode, SECRET_KEY, algorithm="HS256")
+
+def purge_guest_accounts(db: Session, older_than: datetime) -> int:
+    n = (
+        db.query(models.User)
+        .filter(
+            models.User.email.like(LEGACY_GUEST_EMAIL, escape="\\"),
+            models.User.created_at < older_than
+        )
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return n
+
 # --- Menu Management ---
 def get_menu_items(db: Session, restaurant_id: int):
     return db.query(models.MenuItem).filter(models.MenuItem.restaurant_id == restaurant_id).all()
@@ -49,52 +84,172 @@ def get_menu_items(db: Session, restaurant_id: int):
 def get_menu_item(db: Session, item_id: int):
     return db.query(models.MenuItem).get(item_id)
 
+def group_by_category(items) -> List[schemas.CategoryOut]:
+    groups = defaultdict(list)
+    for it in items:
+        groups[it.category].append(schemas.MenuItemOut.from_orm(it))
+    return [schemas.CategoryOut(name=name, items=its) for name, its in groups.items()]
+
+def _load_menu(db: Session, restaurant_id: int) -> List[schemas.CategoryOut]:
+    items = (
+        db.query(models.MenuItem)
+        .filter(models.MenuItem.restaurant_id == restaurant_id,
+                models.MenuItem.available == True)
+        .order_by(models.MenuItem.id)
+        .all()
+    )
+    return group_by_category(items)
+
+def _menu_view(db: Session, restaurant_id: int, category: Optional[str]):
+    # Cached (categories, etag) pair; per-category views derive from the full menu
+    def load():
+        if category:
+            cats = [c for c in _menu_view(db, restaurant_id, None)[0] if c.name == category]
+        else:
+            cats = _load_menu(db, restaurant_id)
+        return cats, compute_etag(cats)
+    return menu_cache.get_or_load(restaurant_id, ("menu", category), load)
+
+def _search_menu(
+    db: Session,
+    restaurant_id: int,
+    category: Optional[str],
+    search: str
+) -> List[schemas.CategoryOut]:
+    ids = search_index.get_index(db).search(db, restaurant_id, search, category)
+    if not ids:
+        return []
+    rows = {m.id: m for m in db.query(models.MenuItem).filter(models.MenuItem.id.in_(ids))}
+    # Keep rank order within each category
+    return group_by_category(rows[i] for i in ids if i in rows)
+
 def get_categories(
     db: Session,
     restaurant_id: int,
     category: Optional[str] = None,
     search: Optional[str] = None
 ) -> List[schemas.CategoryOut]:
-    q = (
-        db.query(models.MenuItem)
-        .filter(models.MenuItem.restaurant_id == restaurant_id,
-                models.MenuItem.available == True)
-    )
-    if category:
-        q = q.filter(models.MenuItem.category == category)
     if search:
-        q = q.filter(models.MenuItem.name.ilike(f"%{search}%"))
-    items = q.all()
+        # Free-text search goes through the search index, not the menu cache
+        return _search_menu(db, restaurant_id, category, search)
+    return _menu_view(db, restaurant_id, category)[0]
+
+def get_menu(
+    db: Session,
+    restaurant_id: int,
+    category: Optional[str] = None,
+    search: Optional[str] = None
+) -> Tuple[dict, str]:
+    if search:
+        cats = _search_menu(db, restaurant_id, category, search)
+        return {"categories": cats}, compute_etag(cats)
+    cats, etag = _menu_view(db, restaurant_id, category)
+    return {"categories": cats}, etag
+
+def _featured_view(db: Session, restaurant_id: int, limit: int):
+    def load():
+        items = (
+            db.query(models.MenuItem)
+            .filter(
+                models.MenuItem.restaurant_id == restaurant_id,
+                models.MenuItem.category == "popular",
+                models.MenuItem.available == True
+            )
+            .limit(limit)
+            .all()
+        )
+        out = [schemas.MenuItemOut.from_orm(i) for i in items]
+        return out, compute_etag(out)
+    return menu_cache.get_or_load(restaurant_id, ("featured", limit), load)
+
+# Fast JSON path: plain dict rows in MenuItemOut shape, encoded once and cached
+# as bytes, so neither the ORM identity map nor pydantic is involved.
+MENU_ITEM_COLUMNS = (
+    models.MenuItem.id, models.MenuItem.name, models.MenuItem.description,
+    models.MenuItem.price, models.MenuItem.category, models.MenuItem.available,
+)
+
+def menu_rows_stmt(restaurant_id: int):
+    return (
+        select(*MENU_ITEM_COLUMNS)
+        .where(models.MenuItem.restaurant_id == restaurant_id,
+               models.MenuItem.available == True)
+        .order_by(models.MenuItem.id)
+    )
+
+def featured_rows_stmt(restaurant_id: int, limit: int):
+    return (
+        select(*MENU_ITEM_COLUMNS)
+        .where(models.MenuItem.restaurant_id == restaurant_id,
+               models.MenuItem.category == "popular",
+               models.MenuItem.available == True)
+        .limit(limit)
+    )
+
+def menu_item_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "description": row.description,
+        "price": float(row.price),
+        "category": row.category,
+        "available": bool(row.available),
+    }
 
-    from collections import defaultdict
+def group_rows_by_category(rows) -> List[dict]:
     groups = defaultdict(list)
-    for it in items:
-        groups[it.category].append(it)
+    for r in rows:
+        groups[r.category].append(menu_item_dict(r))
+    return [{"name": name, "items": its} for name, its in groups.items()]
 
-    out: List[schemas.CategoryOut] = []
-    for cat_name, its in groups.items():
-        out.append(schemas.CategoryOut(
-            name=cat_name,
-            items=[schemas.MenuItemOut.from_orm(i) for i in its]
-        ))
-    return out
+def encode_with_etag(payload) -> Tuple[bytes, str]:
+    body = fastjson.dumps(payload)
+    return body, etag_for_bytes(body)
+
+def get_menu_json(
+    db: Session,
+    restaurant_id: int,
+    category: Optional[str] = None,
+    search: Optional[str] = None
+) -> Tuple[bytes, str]:
+    if search:
+        ids = search_index.get_index(db).search(db, restaurant_id, search, category)
+        rows = {}
+        if ids:
+            stmt = select(*MENU_ITEM_COLUMNS).where(models.MenuItem.id.in_(ids))
+            rows = {r.id: r for r in db.execute(stmt)}
+        return encode_with_etag({"categories": group_rows_by_category(rows[i] for i in ids if i in rows)})
+
+    def load():
+        cats = menu_cache.get_or_load(
+            restaurant_id, ("menu_rows", None),
+            lambda: group_rows_by_category(db.execute(menu_rows_stmt(restaurant_id)))
+        )
+        if category:
+            cats = [c for c in cats if c["name"] == category]
+        return encode_with_etag({"categories": cats})
+    return menu_cache.get_or_load(restaurant_id, ("menu_json", category), load)
+
+def get_featured_json(db: Session, restaurant_id: int, limit: int = 5) -> Tuple[bytes, str]:
+    def load():
+        rows = db.execute(featured_rows_stmt(restaurant_id, limit))
+        return encode_with_etag({"featured_items": [menu_item_dict(r) for r in rows]})
+    return menu_cache.get_or_load(restaurant_id, ("featured_json", limit), load)
 
 def get_featured(
     db: Session,
     restaurant_id: int,
     limit: int = 5
 ) -> List[schemas.MenuItemOut]:
-    items = (
-        db.query(models.MenuItem)
-        .filter(
-            models.MenuItem.restaurant_id == restaurant_id,
-            models.MenuItem.category == "popular",
-            models.MenuItem.available == True
-        )
-        .limit(limit)
-        .all()
-    )
-    return [schemas.MenuItemOut.from_orm(i) for i in items]
+    return _featured_view(db, restaurant_id, limit)[0]
+
+def get_featured_with_etag(
+    db: Session,
+    restaurant_id: int,
+    limit: int = 5
+) -> Tuple[dict, str]:
+    items, etag = _featured_view(db, restaurant_id, limit)
+    return {"featured_items": items}, etag
 
 def create_menu_item(
     db: Session,
@@ -112,6 +267,7 @@ def create_menu_item(
     db.add(item)
     db.commit()
     db.refresh(item)
+    menu_cache.bump(restaurant_id)
     return item
 
 def update_menu_item(
@@ -123,11 +279,128 @@ def update_menu_item(
         setattr(item, k, v)
     db.commit()
     db.refresh(item)
+    menu_cache.bump(item.restaurant_id)
     return item
 
-def delete_menu_item(db: Session, item_id: int):
-    db.query(models.MenuItem).filter(models.MenuItem.id == item_id).delete()
+def delete_menu_item(db: Session, item: models.MenuItem):
+    restaurant_id = item.restaurant_id
+    db.query(models.MenuItem).filter(models.MenuItem.id == item.id).delete()
     db.commit()
+    menu_cache.bump(restaurant_id)
+
+# Bulk import / export
+MENU_IMPORT_BATCH = int(os.getenv("MENU_IMPORT_BATCH", 500))
+MENU_IMPORT_MAX_ERRORS = int(os.getenv("MENU_IMPORT_MAX_ERRORS", 100))
+
+def _describe_error(e: ValueError) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+def import_menu_items(
+    db: Session,
+    restaurant_id: int,
+    rows: Iterable[Tuple[int, Union[dict, Exception]]],
+    atomic: bool = False
+) -> schemas.MenuImportOut:
+    """
+    Upsert (line, row) pairs into a restaurant's menu in one transaction.
+
+    Rows with an id update that item; otherwise they update the item with
+    the same name, or are inserted. Invalid rows are reported and skipped,
+    or roll back everything when ``atomic``. The whole stream is parsed
+    and validated before the first write, so a slow upload never holds the
+    write lock. The menu version is bumped once, after commit.
+    """
+    parsed = []
+    failed = 0
+    errors = []
+
+    def reject(line: int, e: ValueError):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MENU_IMPORT_MAX_ERRORS:
+            errors.append(schemas.MenuImportError(line=line, error=_describe_error(e)))
+
+    for line, raw in rows:
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            parsed.append((line, schemas.MenuImportRow.parse_obj(raw)))
+        except ValueError as e:
+            reject(line, e)
+    if atomic and failed:
+        return schemas.MenuImportOut(inserted=0, updated=0, failed=failed,
+                                     committed=False, errors=errors)
+
+    table = models.MenuItem.__table__
+    update_stmt = (
+        update(table)
+        .where(table.c.id == bindparam("item_id"), table.c.restaurant_id == restaurant_id)
+        .values(name=bindparam("name"), description=bindparam("description"), price=bindparam("price"),
+                category=bindparam("category"), available=bindparam("available"))
+    )
+    try:
+        # Current rows, so partial rows only change the fields they carry
+        existing = {r.id: menu_item_dict(r) for r in db.execute(
+            select(*MENU_ITEM_COLUMNS).where(models.MenuItem.restaurant_id == restaurant_id)
+        )}
+        by_name = {}
+        for item_id in sorted(existing, reverse=True):
+            by_name[existing[item_id]["name"]] = item_id
+        inserts = {}  # name -> values, so repeated names collapse
+        updates = {}  # item id -> merged values
+        inserted = updated = 0
+        for line, row in parsed:
+            if row.id is not None and row.id not in existing:
+                reject(line, ValueError(f"Menu item {row.id} not found"))
+                continue
+            given = row.dict(exclude_unset=True, exclude={"id"})
+            target = row.id or by_name.get(row.name)
+            if target:
+                merged = existing[target]
+                merged.update(given)
+                updates[target] = dict(merged, item_id=target)
+                updated += 1
+            elif row.name in inserts:
+                inserts[row.name].update(given)
+                updated += 1
+            else:
+                inserts[row.name] = dict(row.dict(exclude={"id"}), restaurant_id=restaurant_id)
+                inserted += 1
+        errors.sort(key=lambda err: err.line)
+
+        if atomic and failed:
+            db.rollback()
+            return schemas.MenuImportOut(inserted=0, updated=0, failed=failed,
+                                         committed=False, errors=errors)
+        pending = list(updates.values())
+        for chunk in range(0, len(pending), MENU_IMPORT_BATCH):
+            db.execute(update_stmt, pending[chunk:chunk + MENU_IMPORT_BATCH])
+        pending = list(inserts.values())
+        for chunk in range(0, len(pending), MENU_IMPORT_BATCH):
+            db.execute(table.insert(), pending[chunk:chunk + MENU_IMPORT_BATCH])
+        db.commit()
+    except DBAPIError as e:
+        db.rollback()
+        raise ValueError(f"Import failed: {e.orig}") from e
+    except BaseException:
+        db.rollback()
+        raise
+    menu_cache.bump(restaurant_id)
+    return schemas.MenuImportOut(inserted=inserted, updated=updated, failed=failed,
+                                 committed=True, errors=errors)
+
+def iter_menu_items(db: Session, restaurant_id: int) -> Iterator[dict]:
+    # All items, available or not, streamed from the cursor in batches
+    stmt = (
+        select(*MENU_ITEM_COLUMNS)
+        .where(models.MenuItem.restaurant_id == restaurant_id)
+        .order_by(models.MenuItem.id)
+        .execution_options(yield_per=MENU_IMPORT_BATCH)
+    )
+    for row in db.execute(stmt):
+        yield menu_item_dict(row)
 
 # --- Table & Session ---
 def get_restaurant(db: Session, rid: int) -> models.Restaurant:
@@ -165,20 +438,106 @@ def get_active_session(db: Session, table_id: int) -> Optional[models.Session]:
         .first()
     )
 
+# QR scan lookup. Restaurant and table fields come from table_directory,
+# which mapper events below invalidate; the open session is one index seek
+# (ix_sessions_active on Postgres, ix_sessions_table_end_start on SQLite).
+# A cold scan resolves everything in one joined query.
+def active_session_id_stmt(table_id):
+    return (
+        select(models.Session.id)
+        .where(models.Session.table_id == table_id, models.Session.end_time == None)
+        .order_by(models.Session.start_time.desc())
+        .limit(1)
+    )
+
+def table_lookup_stmt(rid: int, number: str):
+    return (
+        select(
+            models.Restaurant.id.label("restaurant_id"),
+            models.Restaurant.name.label("restaurant_name"),
+            models.Table.id.label("table_id"),
+            models.Table.number.label("table_number"),
+            models.Table.location.label("table_location"),
+            active_session_id_stmt(models.Table.id).scalar_subquery().label("current_session_id"),
+        )
+        .select_from(models.Restaurant)
+        .outerjoin(models.Table, and_(models.Table.restaurant_id == models.Restaurant.id,
+                                      models.Table.number == number))
+        .where(models.Restaurant.id == rid)
+        .limit(1)
+    )
+
+def table_entry(row) -> Optional[dict]:
+    # None: unknown restaurant; table_id None: unknown table
+    if row is None:
+        return None
+    return {k: v for k, v in row.items() if k != "current_session_id"}
+
+def get_table_info(db: Session, rid: int, number: str) -> Optional[dict]:
+    cold = {}
+    def load():
+        row = db.execute(table_lookup_stmt(rid, number)).mappings().first()
+        cold["session_id"] = row["current_session_id"] if row else None
+        return table_entry(row)
+    entry = table_directory.get_or_load(rid, ("table", number), load)
+    if entry is None or entry["table_id"] is None:
+        return entry
+    if "session_id" in cold:
+        session_id = cold["session_id"]
+    else:
+        session_id = db.execute(active_session_id_stmt(entry["table_id"])).scalar()
+    return dict(entry, current_session_id=session_id)
+
+# Directory entries are dropped when the change commits, not at flush, so a
+# concurrent scan cannot re-cache the pre-commit rows
+def _tables_changed(target, restaurant_id: int):
+    session = object_session(target)
+    if session is None:
+        table_directory.bump(restaurant_id)
+    else:
+        session.info.setdefault("tables_changed", set()).add(restaurant_id)
+
+@event.listens_for(models.Restaurant, "after_insert")
+@event.listens_for(models.Restaurant, "after_update")
+@event.listens_for(models.Restaurant, "after_delete")
+def _restaurant_changed(mapper, connection, target):
+    _tables_changed(target, target.id)
+
+@event.listens_for(models.Table, "after_insert")
+@event.listens_for(models.Table, "after_update")
+@event.listens_for(models.Table, "after_delete")
+def _table_changed(mapper, connection, target):
+    _tables_changed(target, target.restaurant_id)
+
+@event.listens_for(Session, "after_commit")
+def _bump_table_directory(session):
+    for restaurant_id in session.info.pop("tables_changed", ()):
+        table_directory.bump(restaurant_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_table_changes(session):
+    session.info.pop("tables_changed", None)
+
 # --- Orders ---
-def create_order(db: Session, data: schemas.CreateOrderIn) -> schemas.CreateOrderOut:
-    # Calculate subtotal
+# Pure helpers shared with crud_async
+def price_order(data: schemas.CreateOrderIn, menu: dict) -> Tuple[float, float, float]:
+    # Validate and calculate subtotal before writing anything
+    if not data.items:
+        raise ValueError("Order has no items")
     subtotal = 0
     for oi in data.items:
-        mi = db.query(models.MenuItem).get(oi.item_id)
-        if not mi or not mi.available:
+        mi = menu.get(oi.item_id)
+        if not mi or not mi.available or mi.restaurant_id != data.restaurant_id:
             raise ValueError(f"MenuItem {oi.item_id} not available")
+        if oi.quantity <= 0:
+            raise ValueError(f"Invalid quantity for MenuItem {oi.item_id}")
         subtotal += float(mi.price) * oi.quantity
-
     tax = round(subtotal * TAX_RATE, 2)
     total = round(subtotal + tax, 2)
+    return subtotal, tax, total
 
-    order = models.Order(
+def new_order(data: schemas.CreateOrderIn, total: float) -> models.Order:
+    return models.Order(
         restaurant_id=data.restaurant_id,
         table_id=data.table_id,
         session_id=data.session_id,
@@ -186,35 +545,79 @@ def create_order(db: Session, data: schemas.CreateOrderIn) -> schemas.CreateOrde
         status=models.OrderStatusEnum.pending,
         total_amount=total
     )
+
+def order_line_rows(order_id: int, data: schemas.CreateOrderIn, menu: dict) -> List[dict]:
+    return [
+        {
+            "order_id": order_id,
+            "menu_id": oi.item_id,
+            "quantity": oi.quantity,
+            "unit_price": menu[oi.item_id].price,
+            "special_instructions": oi.special_instructions,
+        }
+        for oi in data.items
+    ]
+
+def order_created_event(order_id: int, created_at: datetime, data: schemas.CreateOrderIn, total: float) -> dict:
+    return {
+        "order_id": order_id,
+        "order_number": f"#{order_id:06d}",
+        "table_id": data.table_id,
+        "session_id": data.session_id,
+        "status": models.OrderStatusEnum.pending,
+        "total": total,
+        "created_at": created_at,
+        "items": [oi.dict() for oi in data.items],
+    }
+
+def create_order(db: Session, data: schemas.CreateOrderIn) -> schemas.CreateOrderOut:
+    # Fetch every referenced menu item in one round trip
+    ids = {oi.item_id for oi in data.items}
+    menu = {
+        mi.id: mi
+        for mi in db.query(models.MenuItem).filter(models.MenuItem.id.in_(ids))
+    }
+    subtotal, tax, total = price_order(data, menu)
+
+    # Header and line items go out in a single transaction
+    order = new_order(data, total)
     db.add(order)
+    db.flush()
+    lines = order_line_rows(order.id, data, menu)
+    db.execute(models.OrderItem.__table__.insert(), lines)
+    order_id, created_at = order.id, order.created_at
+    rollups.apply(db, rollups.order_placed(data.restaurant_id, created_at, total, lines))
+    event = order_created_event(order_id, created_at, data, total)
+    # Side effects ride the outbox so they commit (or roll back) with the order
+    if outbox.handles("order.created"):
+        db.execute(models.OutboxMessage.__table__.insert(),
+                   outbox.message("order.created", dict(event, restaurant_id=data.restaurant_id)))
     db.commit()
-    db.refresh(order)
+    outbox.notify()
 
-    # Create line items
-    for oi in data.items:
-        mi = db.query(models.MenuItem).get(oi.item_id)
-        oi_rec = models.OrderItem(
-            order_id=order.id,
-            menu_id=oi.item_id,
-            quantity=oi.quantity,
-            unit_price=mi.price,
-            special_instructions=oi.special_instructions
-        )
-        db.add(oi_rec)
-    db.commit()
+    if not events.PUBLISH_VIA_OUTBOX:
+        events.publish([events.restaurant_channel(data.restaurant_id)], "order.created", event)
 
     return schemas.CreateOrderOut(
-        order_id=order.id,
-        order_number=f"#{order.id:06d}",
+        order_id=order_id,
+        order_number=f"#{order_id:06d}",
         estimated_time=15,
         subtotal=subtotal,
         tax=tax,
         total=total,
-        created_at=order.created_at
+        created_at=created_at
     )
 
 def get_order(db: Session, oid: int) -> schemas.OrderStatusOut:
-    order = db.query(models.Order).get(oid)
+    order = (
+        db.query(models.Order)
+        .options(selectinload(models.Order.items))
+        .filter(models.Order.id == oid)
+        .first()
+    )
+    if not order:
+        # Closed orders move to the archive after ARCHIVE_AFTER_DAYS
+        order = archive.get_archived_order(db, oid)
     if not order:
         return None
     items = [
@@ -232,32 +635,244 @@ def get_order(db: Session, oid: int) -> schemas.OrderStatusOut:
         items=items
     )
 
+def get_order_status(db: Session, oid: int) -> Optional[models.OrderStatusEnum]:
+    row = db.query(models.Order.status).filter(models.Order.id == oid).first()
+    return row[0] if row else None
+
 # --- Payments ---
-def create_payment(db: Session, data: schemas.CreatePaymentIn): ...
-def confirm_payment(db: Session, intent_id: str): ...
-def split_bill(db: Session, data: schemas.SplitBillIn): ...
+# The provider calls live in app.gateway and run on the event loop; these
+# are the database halves the payment routes run in the threadpool.
+CLOSED_STATUSES = (models.OrderStatusEnum.paid, models.OrderStatusEnum.cancelled)
+# A pending payment gets its intent within one provider call; one still
+# without an intent after this long was orphaned (crash, failed rollback)
+PAYMENT_ATTACH_GRACE = float(os.getenv("PAYMENT_ATTACH_GRACE", 120))
+
+def amount_paid(db: Session, oid: int) -> Decimal:
+    paid = (
+        db.query(func.coalesce(func.sum(models.Payment.amount), 0))
+        .filter(models.Payment.order_id == oid, models.Payment.status == gateway.SUCCEEDED)
+        .scalar()
+    )
+    return Decimal(str(paid))
+
+def amount_committed(db: Session, oid: int) -> Decimal:
+    # Succeeded plus live pending payments; orphaned ones don't hold the balance
+    cutoff = datetime.utcnow() - timedelta(seconds=PAYMENT_ATTACH_GRACE)
+    live = or_(
+        models.Payment.status == gateway.SUCCEEDED,
+        and_(models.Payment.status == gateway.PENDING,
+             or_(models.Payment.intent_id.is_not(None), models.Payment.created_at >= cutoff)),
+    )
+    committed = (
+        db.query(func.coalesce(func.sum(models.Payment.amount), 0))
+        .filter(models.Payment.order_id == oid, live)
+        .scalar()
+    )
+    return Decimal(str(committed))
+
+def amount_due(db: Session, order: models.Order) -> Decimal:
+    return max(Decimal(str(order.total_amount)) - amount_paid(db, order.id), Decimal(0))
+
+def _open_order(db: Session, oid: int, lock: bool = False) -> models.Order:
+    query = db.query(models.Order).filter(models.Order.id == oid)
+    order = (query.with_for_update() if lock else query).first()
+    if not order:
+        raise ValueError("Order not found")
+    if order.status in CLOSED_STATUSES:
+        raise ValueError(f"Order is already {order.status.value}")
+    return order
+
+def create_payment(db: Session, data: schemas.CreatePaymentIn) -> models.Payment:
+    # Record a pending payment; the route then creates its intent at the provider.
+    # Pending payments count against the balance, and the order row is locked
+    # so two concurrent intents cannot both fit under it.
+    order = _open_order(db, data.order_id, lock=True)
+    amount = Decimal(str(data.amount)).quantize(CENT)
+    if amount <= 0:
+        raise ValueError("Amount must be positive")
+    if amount > Decimal(str(order.total_amount)) - amount_committed(db, order.id):
+        raise ValueError("Amount exceeds the balance due, including pending payments")
+    payment = models.Payment(
+        order_id=order.id,
+        payment_method=data.payment_method,
+        amount=amount,
+        currency=(data.currency or "USD").upper(),
+        status=gateway.PENDING
+    )
+    db.add(payment)
+    db.commit()
+    db.refresh(payment)
+    return payment
+
+def attach_payment_intent(db: Session, payment_id: int, intent_id: str):
+    db.query(models.Payment).filter(models.Payment.id == payment_id).update(
+        {models.Payment.intent_id: intent_id}, synchronize_session=False
+    )
+    db.commit()
+
+def fail_payment(db: Session, payment_id: int):
+    db.query(models.Payment).filter(
+        models.Payment.id == payment_id, models.Payment.status == gateway.PENDING
+    ).update({models.Payment.status: gateway.FAILED}, synchronize_session=False)
+    db.commit()
+
+def confirm_payment(db: Session, intent_id: str, status: str = gateway.SUCCEEDED) -> Optional[str]:
+    """
+    Apply the provider's verdict on an intent (webhook or client confirm)
+    and return the payment's resulting status, or None for an unknown
+    intent. Once succeeded payments cover the total, the order is marked
+    paid in the same transaction. Replayed and out-of-order notifications
+    are no-ops.
+    """
+    payment = (
+        db.query(models.Payment)
+        .filter(models.Payment.intent_id == intent_id)
+        .with_for_update()
+        .first()
+    )
+    if not payment:
+        return None
+    if payment.status == gateway.SUCCEEDED or payment.status == status:
+        return payment.status
+    payment.status = status
+    db.flush()
+    if status == gateway.SUCCEEDED:
+        # Lock the order so concurrent split payments see each other's totals
+        order = (
+            db.query(models.Order)
+            .filter(models.Order.id == payment.order_id)
+            .with_for_update()
+            .first()
+        )
+        if order and order.status not in CLOSED_STATUSES and amount_due(db, order) == 0:
+            change_order_status(db, order.id, models.OrderStatusEnum.paid)  # commits
+            return status
+    db.commit()
+    return status
+
+def _split_evenly(amount: Decimal, parts: int) -> List[Decimal]:
+    # Whole cents; the first shares absorb the remainder
+    cents = int(amount * 100)
+    base, extra = divmod(cents, parts)
+    return [Decimal(base + (1 if i < extra else 0)) / 100 for i in range(parts)]
+
+def split_bill(db: Session, data: schemas.SplitBillIn) -> schemas.SplitBillOut:
+    """
+    Split what is still due on an order. Nothing is stored: each option is
+    settled with its own payment, and split_id is the order id.
+    """
+    order = _open_order(db, data.order_id)
+    due = amount_due(db, order)
+    if data.split_method == "equal":
+        if not data.split_count or data.split_count < 2:
+            raise ValueError("split_count must be at least 2")
+        options = [
+            {"share": i + 1, "amount": float(amount)}
+            for i, amount in enumerate(_split_evenly(due, data.split_count))
+        ]
+    elif data.split_method == "custom":
+        if not data.custom_split:
+            raise ValueError("custom_split is required")
+        ordered = defaultdict(int)
+        prices = {}
+        for line in order.items:
+            ordered[line.menu_id] += line.quantity
+            prices[line.menu_id] = Decimal(str(line.unit_price))
+        subtotal = Decimal(0)
+        for oi in data.custom_split:
+            if oi.quantity <= 0 or oi.quantity > ordered.get(oi.item_id, 0):
+                raise ValueError(f"MenuItem {oi.item_id} is not on the order in that quantity")
+            ordered[oi.item_id] -= oi.quantity
+            subtotal += prices[oi.item_id] * oi.quantity
+        share = min((subtotal * (1 + Decimal(str(TAX_RATE)))).quantize(CENT), due)
+        rest = [{"item_id": item_id, "quantity": qty} for item_id, qty in ordered.items() if qty]
+        options = [
+            {"share": 1, "items": [oi.dict() for oi in data.custom_split], "amount": float(share)},
+            {"share": 2, "items": rest, "amount": float(due - share)},
+        ]
+    else:
+        raise ValueError("split_method must be equal or custom")
+    return schemas.SplitBillOut(split_id=order.id, split_options=options)
 
 # --- Admin ---
+ORDER_COUNT_TTL = float(os.getenv("ORDER_COUNT_TTL", 10))
+_order_counts = LRUCache(maxsize=1024, ttl=ORDER_COUNT_TTL)
+
+def encode_order_cursor(created_at: datetime, oid: int) -> str:
+    raw = f"{created_at.isoformat()}|{oid}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_order_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, oid = raw.split("|")
+        return datetime.fromisoformat(ts), int(oid)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def count_orders(db: Session, restaurant_id: Optional[int], status: Optional[schemas.OrderStatusEnum]) -> int:
+    # Totals are cached briefly; dashboards poll far more often than they need an exact count
+    key = (restaurant_id, status)
+    total = _order_counts.get(key)
+    if total is None:
+        q = db.query(func.count(models.Order.id))
+        if restaurant_id:
+            q = q.filter(models.Order.restaurant_id == restaurant_id)
+        if status:
+            q = q.filter(models.Order.status == status)
+        total = q.scalar()
+        _order_counts.set(key, total)
+    return total
+
 def list_orders(
     db: Session,
     restaurant_id: Optional[int],
     status: Optional[schemas.OrderStatusEnum],
     limit: int,
-    page: int
+    page: int = 1,
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    raw: bool = False
 ) -> Tuple[List[schemas.ActiveOrderOut], schemas.Pagination]:
-    q = db.query(models.Order)
+    # raw=True returns plain dicts in ActiveOrderOut shape (fast JSON path)
+    q = (
+        db.query(models.Order)
+        .options(selectinload(models.Order.items), joinedload(models.Order.table))
+    )
     if restaurant_id:
         q = q.filter(models.Order.restaurant_id == restaurant_id)
     if status:
         q = q.filter(models.Order.status == status)
+    q = q.order_by(models.Order.created_at.desc(), models.Order.id.desc())
 
-    total = q.count()
-    pages = (total + limit - 1) // limit
-    offs = (page - 1) * limit
+    if cursor:
+        # Keyset pagination on (created_at, id): cost is independent of depth
+        created_at, oid = decode_order_cursor(cursor)
+        q = q.filter(or_(
+            models.Order.created_at < created_at,
+            and_(models.Order.created_at == created_at, models.Order.id < oid)
+        ))
+        page = None
+    elif page > 1:
+        q = q.offset((page - 1) * limit)
 
-    orders = q.order_by(models.Order.created_at.desc()).offset(offs).limit(limit).all()
+    orders = q.limit(limit).all()
     out = []
     for o in orders:
+        if raw:
+            out.append({
+                "order_id": o.id,
+                "order_number": f"#{o.id:06d}",
+                "table_number": int(o.table.number),
+                "items": [{
+                    "item_id": i.menu_id,
+                    "quantity": i.quantity,
+                    "special_instructions": i.special_instructions,
+                } for i in o.items],
+                "status": o.status.value,
+                "created_at": o.created_at,
+            })
+            continue
         items = [schemas.OrderItemIn(
             item_id=i.menu_id,
             quantity=i.quantity,
@@ -271,8 +886,74 @@ def list_orders(
             status=o.status,
             created_at=o.created_at
         ))
+
+    total = pages = None
+    if with_total:
+        total = count_orders(db, restaurant_id, status)
+        pages = (total + limit - 1) // limit
+    next_cursor = None
+    if len(orders) == limit:
+        next_cursor = encode_order_cursor(orders[-1].created_at, orders[-1].id)
     return out, schemas.Pagination(
-        total=total, current_page=page, total_pages=pages
+        total=total, current_page=page, total_pages=pages, next_cursor=next_cursor
     )
 
-def change_order_status(db: Session, oid: int, status): ...
\ No newline at end of file
+def change_order_status(
+    db: Session,
+    oid: int,
+    status: schemas.OrderStatusEnum,
+    estimated_completion_time: Optional[int] = None
+) -> Optional[schemas.UpdateStatusOut]:
+    order = db.query(models.Order).get(oid)
+    if not order:
+        return None
+    now = datetime.utcnow()
+    previous = order.status
+    order.status = status
+    if status == models.OrderStatusEnum.paid and not order.paid_at:
+        order.paid_at = now
+    rollups.record_status_change(db, order, previous)
+    restaurant_id = order.restaurant_id
+    event = {
+        "order_id": oid,
+        "previous_status": previous,
+        "status": status,
+        "estimated_completion_time": estimated_completion_time,
+        "updated_at": now,
+    }
+    if outbox.handles("order.status_changed"):
+        db.execute(models.OutboxMessage.__table__.insert(),
+                   outbox.message("order.status_changed", dict(event, restaurant_id=restaurant_id)))
+    db.commit()
+    outbox.notify()
+
+    if not events.PUBLISH_VIA_OUTBOX:
+        events.publish([events.restaurant_channel(restaurant_id), events.order_channel(oid)], "order.status_changed", event)
+    return schemas.UpdateStatusOut(success=True, order_id=oid, status=status, updated_at=now)
+
+def get_archived_order(db: Session, oid: int) -> Optional[schemas.ArchivedOrderOut]:
+    order = archive.get_archived_order(db, oid)
+    if not order:
+        return None
+    return schemas.ArchivedOrderOut(
+        order_id=order.id,
+        order_number=f"#{order.id:06d}",
+        restaurant_id=order.restaurant_id,
+        table_id=order.table_id,
+        session_id=order.session_id,
+        status=order.status,
+        total=order.total_amount,
+        created_at=order.created_at,
+        paid_at=order.paid_at,
+        archived_at=order.archived_at,
+        items=[
+            schemas.ArchivedOrderItemOut(
+                item_id=oi.menu_id,
+                quantity=oi.quantity,
+                unit_price=oi.unit_price,
+                special_instructions=oi.special_instructions
+            )
+            for oi in order.items
+        ],
+        payments=[schemas.ArchivedPaymentOut.from_orm(p) for p in order.payments]
+    )
@@ -0,0 +1,198 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from . import archive, crud, events, models, outbox, rollups, schemas
+from . import search as search_index
+from .cache import menu_cache, table_directory
+from .etag import compute_etag
+
+# Async counterparts of the guest hot-path functions in crud.py.
+# Validation, pricing and payload shapes come from crud so both paths agree.
+
+# --- Menu ---
+async def _load_menu(db: AsyncSession, restaurant_id: int) -> List[schemas.CategoryOut]:
+    res = await db.execute(
+        select(models.MenuItem)
+        .where(models.MenuItem.restaurant_id == restaurant_id,
+               models.MenuItem.available == True)
+        .order_by(models.MenuItem.id)
+    )
+    return crud.group_by_category(res.scalars().all())
+
+async def _menu_view(db: AsyncSession, restaurant_id: int, category: Optional[str]):
+    async def load():
+        if category:
+            cats = [c for c in (await _menu_view(db, restaurant_id, None))[0] if c.name == category]
+        else:
+            cats = await _load_menu(db, restaurant_id)
+        return cats, compute_etag(cats)
+    return await menu_cache.aget_or_load(restaurant_id, ("menu", category), load)
+
+async def _search_menu(
+    db: AsyncSession,
+    restaurant_id: int,
+    category: Optional[str],
+    search: str
+) -> List[schemas.CategoryOut]:
+    ids = await db.run_sync(
+        lambda s: search_index.get_index(s).search(s, restaurant_id, search, category)
+    )
+    if not ids:
+        return []
+    res = await db.execute(select(models.MenuItem).where(models.MenuItem.id.in_(ids)))
+    rows = {m.id: m for m in res.scalars()}
+    return crud.group_by_category(rows[i] for i in ids if i in rows)
+
+async def get_menu(
+    db: AsyncSession,
+    restaurant_id: int,
+    category: Optional[str] = None,
+    search: Optional[str] = None
+) -> Tuple[dict, str]:
+    if search:
+        cats = await _search_menu(db, restaurant_id, category, search)
+        return {"categories": cats}, compute_etag(cats)
+    cats, etag = await _menu_view(db, restaurant_id, category)
+    return {"categories": cats}, etag
+
+async def get_menu_json(
+    db: AsyncSession,
+    restaurant_id: int,
+    category: Optional[str] = None,
+    search: Optional[str] = None
+) -> Tuple[bytes, str]:
+    if search:
+        ids = await db.run_sync(
+            lambda s: search_index.get_index(s).search(s, restaurant_id, search, category)
+        )
+        rows = {}
+        if ids:
+            stmt = select(*crud.MENU_ITEM_COLUMNS).where(models.MenuItem.id.in_(ids))
+            rows = {r.id: r for r in await db.execute(stmt)}
+        return crud.encode_with_etag({"categories": crud.group_rows_by_category(rows[i] for i in ids if i in rows)})
+
+    async def load_rows():
+        return crud.group_rows_by_category(await db.execute(crud.menu_rows_stmt(restaurant_id)))
+
+    async def load():
+        cats = await menu_cache.aget_or_load(restaurant_id, ("menu_rows", None), load_rows)
+        if category:
+            cats = [c for c in cats if c["name"] == category]
+        return crud.encode_with_etag({"categories": cats})
+    return await menu_cache.aget_or_load(restaurant_id, ("menu_json", category), load)
+
+async def get_featured_json(db: AsyncSession, restaurant_id: int, limit: int = 5) -> Tuple[bytes, str]:
+    async def load():
+        rows = await db.execute(crud.featured_rows_stmt(restaurant_id, limit))
+        return crud.encode_with_etag({"featured_items": [crud.menu_item_dict(r) for r in rows]})
+    return await menu_cache.aget_or_load(restaurant_id, ("featured_json", limit), load)
+
+async def get_featured_with_etag(
+    db: AsyncSession,
+    restaurant_id: int,
+    limit: int = 5
+) -> Tuple[dict, str]:
+    async def load():
+        res = await db.execute(
+            select(models.MenuItem)
+            .where(
+                models.MenuItem.restaurant_id == restaurant_id,
+                models.MenuItem.category == "popular",
+                models.MenuItem.available == True
+            )
+            .limit(limit)
+        )
+        out = [schemas.MenuItemOut.from_orm(i) for i in res.scalars()]
+        return out, compute_etag(out)
+    items, etag = await menu_cache.aget_or_load(restaurant_id, ("featured", limit), load)
+    return {"featured_items": items}, etag
+
+# --- Table & Session ---
+async def get_table_info(db: AsyncSession, rid: int, number: str) -> Optional[dict]:
+    cold = {}
+    async def load():
+        row = (await db.execute(crud.table_lookup_stmt(rid, number))).mappings().first()
+        cold["session_id"] = row["current_session_id"] if row else None
+        return crud.table_entry(row)
+    entry = await table_directory.aget_or_load(rid, ("table", number), load)
+    if entry is None or entry["table_id"] is None:
+        return entry
+    if "session_id" in cold:
+        session_id = cold["session_id"]
+    else:
+        session_id = (await db.execute(crud.active_session_id_stmt(entry["table_id"]))).scalar()
+    return dict(entry, current_session_id=session_id)
+
+async def create_session(db: AsyncSession, restaurant_id: int, table_id: int, user_id: Optional[int]):
+    session = models.Session(
+        restaurant_id=restaurant_id,
+        table_id=table_id,
+        user_id=user_id
+    )
+    db.add(session)
+    await db.commit()
+    return session
+
+# --- Orders ---
+async def create_order(db: AsyncSession, data: schemas.CreateOrderIn) -> schemas.CreateOrderOut:
+    ids = {oi.item_id for oi in data.items}
+    res = await db.execute(select(models.MenuItem).where(models.MenuItem.id.in_(ids)))
+    menu = {mi.id: mi for mi in res.scalars()}
+    subtotal, tax, total = crud.price_order(data, menu)
+
+    order = crud.new_order(data, total)
+    db.add(order)
+    await db.flush()
+    lines = crud.order_line_rows(order.id, data, menu)
+    await db.execute(models.OrderItem.__table__.insert(), lines)
+    order_id, created_at = order.id, order.created_at
+    await rollups.aapply(db, rollups.order_placed(data.restaurant_id, created_at, total, lines))
+    event = crud.order_created_event(order_id, created_at, data, total)
+    if outbox.handles("order.created"):
+        await db.execute(models.OutboxMessage.__table__.insert(),
+                         outbox.message("order.created", dict(event, restaurant_id=data.restaurant_id)))
+    await db.commit()
+    outbox.notify()
+
+    if not events.PUBLISH_VIA_OUTBOX:
+        await events.apublish([events.restaurant_channel(data.restaurant_id)], "order.created", event)
+
+    return schemas.CreateOrderOut(
+        order_id=order_id,
+        order_number=f"#{order_id:06d}",
+        estimated_time=15,
+        subtotal=subtotal,
+        tax=tax,
+        total=total,
+        created_at=created_at
+    )
+
+async def get_order(db: AsyncSession, oid: int) -> Optional[schemas.OrderStatusOut]:
+    res = await db.execute(
+        select(models.Order)
+        .options(selectinload(models.Order.items))
+        .where(models.Order.id == oid)
+    )
+    order = res.scalars().first()
+    if not order:
+        order = (await db.execute(archive.archived_order_stmt(oid))).scalars().first()
+    if not order:
+        return None
+    return schemas.OrderStatusOut(
+        order_id=order.id,
+        status=order.status,
+        estimated_completion_time=None,
+        items=[
+            schemas.OrderItemIn(
+                item_id=oi.menu_id,
+                quantity=oi.quantity,
+                special_instructions=oi.special_instructions
+            )
+            for oi in order.items
+        ]
+    )
+
+async def get_order_status(db: AsyncSession, oid: int) -> Optional[models.OrderStatusEnum]:
+    res = await db.execute(select(models.Order.status).where(models.Order.id == oid))
+    return res.scalar()
@@ -1,13 +1,171 @@
 import os
-from sqlalchemy import create_engine
+import re
+import threading
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.elements import TextClause
 
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///./qr_order.db")
+# DB_ASYNC=1 serves the guest hot path (menu, table, orders) from async routes
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+
+# Pool profile (server databases; SQLite uses the same pool for its file connections)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+# SQLite tuning
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000))  # ms
+SQLITE_SERIALIZE_WRITES = os.getenv("SQLITE_SERIALIZE_WRITES", "1") == "1"
+
+_SYNC_DRIVERS = {"postgresql+asyncpg": "postgresql", "sqlite+aiosqlite": "sqlite"}
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "postgresql+psycopg2": "postgresql+asyncpg",
+                  "sqlite": "sqlite+aiosqlite", "sqlite+pysqlite": "sqlite+aiosqlite"}
+
+def _swap_driver(url: str, mapping: dict) -> str:
+    scheme, sep, rest = url.partition("://")
+    return mapping.get(scheme, scheme) + sep + rest
+
+def sync_url(url: str) -> str:
+    return _swap_driver(url, _SYNC_DRIVERS)
+
+def async_url(url: str) -> str:
+    return _swap_driver(url, _ASYNC_DRIVERS)
+
+IS_SQLITE = DB_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (":memory:" in DB_URL or DB_URL.rstrip("/").endswith("sqlite:"))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def _engine_kwargs() -> dict:
+    if IS_SQLITE_MEMORY:
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING and not IS_SQLITE,
+    }
+
+def _apply_sqlite_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    if not IS_SQLITE_MEMORY:
+        cur.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cur.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
 
 engine = create_engine(
-    DB_URL,
-    connect_args={"check_same_thread": False} if DB_URL.startswith("sqlite") else {}
+    sync_url(DB_URL),
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    poolclass=None if IS_SQLITE_MEMORY else TimedQueuePool,
+    **_engine_kwargs()
 )
+if IS_SQLITE:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# SQLite allows one writer at a time. Rather than letting concurrent order
+# inserts spin on SQLITE_BUSY, sync sessions take a process-wide lock at
+# their first write and hold it until the transaction ends.
+_sqlite_write_lock = threading.Lock()
+
+def _acquire_write_lock(session):
+    if session.info.get("write_lock"):
+        return
+    if not _sqlite_write_lock.acquire(timeout=SQLITE_BUSY_TIMEOUT / 1000):
+        raise TimeoutError("Timed out waiting for the SQLite write lock")
+    session.info["write_lock"] = True
+
+def _release_write_lock(session, transaction):
+    if transaction.parent is None and session.info.pop("write_lock", False):
+        _sqlite_write_lock.release()
+
+# text() statements report is_select=False even when they only read
+_READ_ONLY_SQL = re.compile(r"\s*(SELECT|EXPLAIN)\b", re.IGNORECASE)
+
+def _is_write(orm_execute_state) -> bool:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        return True
+    statement = orm_execute_state.statement
+    if isinstance(statement, TextClause):
+        return not _READ_ONLY_SQL.match(statement.text)
+    # SELECT ... FOR UPDATE reads in order to write; SQLite ignores the
+    # clause, so the write lock is what keeps two such readers apart
+    return getattr(statement, "_for_update_arg", None) is not None
+
+def _on_execute(orm_execute_state):
+    if _is_write(orm_execute_state):
+        _acquire_write_lock(orm_execute_state.session)
+
+if IS_SQLITE and SQLITE_SERIALIZE_WRITES:
+    event.listen(SessionLocal, "before_flush", lambda session, *_: _acquire_write_lock(session))
+    event.listen(SessionLocal, "do_orm_execute", _on_execute)
+    event.listen(SessionLocal, "after_transaction_end", _release_write_lock)
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    async_engine = create_async_engine(async_url(DB_URL), **_engine_kwargs())
+    if IS_SQLITE:
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    AsyncSessionLocal = sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return {"pool": type(pool).__name__}
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(pool.checkedout() / capacity, 4) if capacity else 0.0,
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "avg_wait_ms": round(1000 * pool.wait_seconds / pool.checkouts, 3) if pool.checkouts else 0.0,
+        "max_wait_ms": round(1000 * pool.max_wait_seconds, 3),
+    }
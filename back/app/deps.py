@@ -1,14 +1,40 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from . import crud, models
-from app.database import SessionLocal
+from app.cache import LRUCache
+from app.database import AsyncSessionLocal, SessionLocal
 import os
 
 SECRET_KEY = os.getenv("JWT_SECRET", "CHANGE_ME")
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 4096))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 30))
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: models.RoleEnum
+    restaurant_id: Optional[int]
+    name: str
+    email: str
+
+# Verified principals keyed by (user_id, token)
+principal_cache = LRUCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+def invalidate_principal(user_id: int):
+    principal_cache.discard_where(lambda key: key[0] == user_id)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _user_changed(mapper, connection, target):
+    invalidate_principal(target.id)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -16,8 +42,20 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def run_with_db(fn, *args):
+    # Short-lived session for code that must not hold a connection across awaits
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
 def get_current_user(token: str = Depends(oauth2_scheme),
-                     db: Session = Depends(get_db)):
+                     db: Session = Depends(get_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -29,7 +67,25 @@ def get_current_user(token: str = Depends(oauth2_scheme),
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+
+    principal = principal_cache.get((user_id, token))
+    if principal is not None:
+        return principal
+
     user = crud.get_user(db, user_id)
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    principal = Principal(
+        id=user.id,
+        role=user.role,
+        restaurant_id=user.restaurant_id,
+        name=user.name,
+        email=user.email,
+    )
+    # Never cache past the token's own expiry
+    ttl = PRINCIPAL_CACHE_TTL
+    if payload.get("exp"):
+        ttl = min(ttl, payload["exp"] - datetime.utcnow().timestamp())
+    if ttl > 0:
+        principal_cache.set((user_id, token), principal, ttl=ttl)
+    return principal
\ No newline at end of file
@@ -0,0 +1,69 @@
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from .fastjson import RawJSONResponse
+
+
+def compute_etag(payload: Any) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return etag_for_bytes(body.encode())
+
+
+def etag_for_bytes(body: bytes) -> str:
+    # For bodies that are already serialized
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+# CompressionMiddleware tags compressed representations "<hash>-<encoding>",
+# since they differ byte for byte from the identity one (RFC 9110 8.8.3)
+ENCODINGS = ("gzip", "br")
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def base_etag(etag: str) -> str:
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if base_etag(candidate) == etag:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def etagged_json(request: Request, body: bytes, etag: str) -> Response:
+    # Pre-serialized body with validators, or 304 if the client is current
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response = RawJSONResponse(body)
+    set_etag(response, etag)
+    return response
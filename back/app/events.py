@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+# Empty => in-process broker (single worker). redis://... => Redis streams,
+# which works with any Redis-protocol server and is shared across workers.
+EVENT_BROKER_URL = os.getenv("EVENT_BROKER_URL", "")
+EVENT_BACKLOG = int(os.getenv("EVENT_BACKLOG", 1000))
+EVENT_MAX_CHANNELS = int(os.getenv("EVENT_MAX_CHANNELS", 10000))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE_SIZE", 1000))
+
+log = logging.getLogger(__name__)
+
+
+class SubscriptionOverflow(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    type: str
+    data: Dict[str, Any]
+
+    def to_sse(self) -> str:
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data)}\n\n"
+
+
+def restaurant_channel(restaurant_id: int) -> str:
+    return f"restaurant:{restaurant_id}"
+
+
+def order_channel(order_id: int) -> str:
+    return f"order:{order_id}"
+
+
+class InProcessSubscription:
+    def __init__(self, broker: "InProcessBroker", channel: str):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event: Event):
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Event]:
+        if self.overflowed and self.queue.empty():
+            raise SubscriptionOverflow(self.channel)
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.broker._unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Per-channel fan-out with a bounded replay backlog.
+
+    publish() is thread-safe so sync crud code running in the request thread
+    pool can call it directly; delivery hops onto each subscriber's loop.
+    """
+
+    def __init__(self, backlog: int = EVENT_BACKLOG, max_channels: int = EVENT_MAX_CHANNELS):
+        self.backlog = backlog
+        self.max_channels = max_channels
+        self._lock = threading.Lock()
+        self._seq = 0
+        # Replay history per channel, least recently published first
+        self._history: "OrderedDict[str, Deque[Event]]" = OrderedDict()
+        self._subscribers: Dict[str, Set[InProcessSubscription]] = {}
+
+    def publish(self, channel: str, type: str, data: Dict[str, Any]) -> Event:
+        with self._lock:
+            self._seq += 1
+            event = Event(str(self._seq), type, jsonable_encoder(data))
+            self._history.setdefault(channel, deque(maxlen=self.backlog)).append(event)
+            self._history.move_to_end(channel)
+            while len(self._history) > self.max_channels:
+                self._history.popitem(last=False)
+            subscribers = list(self._subscribers.get(channel, ()))
+        for sub in subscribers:
+            sub.loop.call_soon_threadsafe(sub.offer, event)
+        return event
+
+    def subscribe(self, channel: str, last_event_id: Optional[str] = None) -> InProcessSubscription:
+        sub = InProcessSubscription(self, channel)
+        with self._lock:
+            # Replay and registration happen atomically, so nothing is missed or doubled
+            if last_event_id and last_event_id.isdigit():
+                for event in self._history.get(channel, ()):
+                    if int(event.id) > int(last_event_id):
+                        sub.offer(event)
+            self._subscribers.setdefault(channel, set()).add(sub)
+        return sub
+
+    def _unsubscribe(self, sub: InProcessSubscription):
+        with self._lock:
+            subs = self._subscribers.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.channel]
+
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscribers.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "broker": "in-process",
+            "channels": len(self._history),
+            "subscribers": self.subscriber_count(),
+            "last_event_id": self._seq,
+        }
+
+
+class RedisSubscription:
+    def __init__(self, broker: "RedisBroker", channel: str, last_event_id: Optional[str]):
+        self.broker = broker
+        self.channel = channel
+        self.last_id = last_event_id or "$"
+        self._buffer: Deque[Event] = deque()
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Event]:
+        if not self._buffer:
+            block = int((timeout or 0) * 1000) or None
+            resp = await self.broker.aclient.xread({self.channel: self.last_id}, count=100, block=block)
+            for _, entries in resp or ():
+                for entry_id, fields in entries:
+                    self.last_id = entry_id
+                    self._buffer.append(Event(entry_id, fields["type"], json.loads(fields["data"])))
+        return self._buffer.popleft() if self._buffer else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class RedisBroker:
+    """Redis streams backend: XADD to publish, XREAD from the last seen id to resume."""
+
+    def __init__(self, url: str, backlog: int = EVENT_BACKLOG):
+        import redis
+        import redis.asyncio
+
+        self.backlog = backlog
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.aclient = redis.asyncio.Redis.from_url(url, decode_responses=True)
+
+    def publish(self, channel: str, type: str, data: Dict[str, Any]) -> Event:
+        data = jsonable_encoder(data)
+        entry_id = self.client.xadd(
+            channel, {"type": type, "data": json.dumps(data)},
+            maxlen=self.backlog, approximate=True,
+        )
+        return Event(entry_id, type, data)
+
+    def subscribe(self, channel: str, last_event_id: Optional[str] = None) -> RedisSubscription:
+        return RedisSubscription(self, channel, last_event_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"broker": "redis"}
+
+
+def _make_broker():
+    if EVENT_BROKER_URL.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(EVENT_BROKER_URL)
+    return InProcessBroker()
+
+
+broker = _make_broker()
+# A shared broker gets order events from the outbox worker (app.outbox_handlers),
+# so a broker outage or a restart delays them instead of losing them. The
+# in-process broker dies with the process anyway and is published to inline.
+PUBLISH_VIA_OUTBOX = isinstance(broker, RedisBroker)
+
+
+def publish(channels: List[str], type: str, data: Dict[str, Any]):
+    # Callers publish after their commit; a broker outage must not turn a
+    # committed write into an error that clients then retry
+    for channel in channels:
+        try:
+            broker.publish(channel, type, data)
+        except Exception:
+            log.exception("Failed to publish %s to %s", type, channel)
+
+
+async def apublish(channels: List[str], type: str, data: Dict[str, Any]):
+    # The in-process broker never blocks; anything networked goes to a thread
+    if isinstance(broker, InProcessBroker):
+        publish(channels, type, data)
+    else:
+        await asyncio.to_thread(publish, channels, type, data)
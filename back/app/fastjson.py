@@ -0,0 +1,52 @@
+import json
+import os
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional: FAST_JSON falls back to the stdlib encoder
+    orjson = None
+
+# FAST_JSON=1: ORJSON default response class, and read-heavy endpoints return
+# pre-serialized bodies instead of re-validating through response_model
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Response for a body that is already encoded JSON bytes."""
+
+    media_type = "application/json"
+
+
+def default_response_class():
+    return ORJSONResponse if FAST_JSON else JSONResponse
+
+
+def response(payload: Any, status_code: int = 200,
+             headers: Optional[Dict[str, str]] = None) -> Response:
+    # Encodes pydantic models / dicts directly, skipping response_model validation
+    return RawJSONResponse(dumps(payload), status_code=status_code, headers=headers)
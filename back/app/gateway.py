@@ -0,0 +1,143 @@
+"""
+Payment provider client.
+
+One pooled httpx.AsyncClient per process, so payment calls reuse keep-alive
+HTTPS connections instead of paying a TLS handshake each, and run on the
+event loop instead of parking a request thread. Calls have bounded
+timeouts; transport errors, 429 and 5xx are retried with backoff. Every
+POST carries an Idempotency-Key, so a retried create never makes a
+second intent at the provider.
+
+Point PAYMENT_GATEWAY_URL at the provider, or at the fake one used for
+tests and benchmarks:
+
+    uvicorn bench.fake_gateway:app --port 8900
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+from decimal import Decimal
+from typing import Optional
+
+import httpx
+
+PAYMENT_GATEWAY_URL = os.getenv("PAYMENT_GATEWAY_URL", "http://127.0.0.1:8900")
+PAYMENT_GATEWAY_KEY = os.getenv("PAYMENT_GATEWAY_KEY", "")
+# Required for /api/payments/webhook; without it the webhook answers 503
+PAYMENT_WEBHOOK_SECRET = os.getenv("PAYMENT_WEBHOOK_SECRET", "")
+PAYMENT_CONNECT_TIMEOUT = float(os.getenv("PAYMENT_CONNECT_TIMEOUT", 3))
+PAYMENT_READ_TIMEOUT = float(os.getenv("PAYMENT_READ_TIMEOUT", 10))
+PAYMENT_POOL_TIMEOUT = float(os.getenv("PAYMENT_POOL_TIMEOUT", 5))
+PAYMENT_MAX_CONNECTIONS = int(os.getenv("PAYMENT_MAX_CONNECTIONS", 100))
+PAYMENT_MAX_KEEPALIVE = int(os.getenv("PAYMENT_MAX_KEEPALIVE", 20))
+PAYMENT_KEEPALIVE_EXPIRY = float(os.getenv("PAYMENT_KEEPALIVE_EXPIRY", 30))
+PAYMENT_RETRIES = int(os.getenv("PAYMENT_RETRIES", 2))
+PAYMENT_RETRY_BACKOFF = float(os.getenv("PAYMENT_RETRY_BACKOFF", 0.2))
+
+SIGNATURE_HEADER = "Gateway-Signature"
+
+# Payment.status values
+PENDING, SUCCEEDED, FAILED = "pending", "succeeded", "failed"
+_STATUSES = {"succeeded": SUCCEEDED, "canceled": FAILED, "failed": FAILED}
+
+
+class GatewayError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def payment_status(intent_status: Optional[str]) -> str:
+    # Anything short of a final state (requires_action, processing, ...) stays pending
+    return _STATUSES.get(intent_status, PENDING)
+
+
+def to_minor_units(amount) -> int:
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1)))
+
+
+def sign(body: bytes, secret: str) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, signature: Optional[str]) -> bool:
+    if not PAYMENT_WEBHOOK_SECRET or not signature:
+        return False
+    return hmac.compare_digest(sign(body, PAYMENT_WEBHOOK_SECRET), signature)
+
+
+class PaymentGateway:
+    def __init__(self, base_url: str = PAYMENT_GATEWAY_URL, api_key: str = PAYMENT_GATEWAY_KEY,
+                 retries: int = PAYMENT_RETRIES, backoff: float = PAYMENT_RETRY_BACKOFF):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.retries = retries
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Pooled connections belong to one event loop; a new loop (tests) gets a new pool
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else {},
+                timeout=httpx.Timeout(PAYMENT_READ_TIMEOUT, connect=PAYMENT_CONNECT_TIMEOUT,
+                                      pool=PAYMENT_POOL_TIMEOUT),
+                limits=httpx.Limits(max_connections=PAYMENT_MAX_CONNECTIONS,
+                                    max_keepalive_connections=PAYMENT_MAX_KEEPALIVE,
+                                    keepalive_expiry=PAYMENT_KEEPALIVE_EXPIRY),
+            )
+            self._loop = loop
+        return self._client
+
+    async def _request(self, method: str, path: str, json: Optional[dict] = None,
+                       idempotency_key: Optional[str] = None) -> dict:
+        client = self._get_client()
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        error: Exception = GatewayError("no attempt made")
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            self.requests += 1
+            try:
+                r = await client.request(method, path, json=json, headers=headers)
+            except httpx.TransportError as e:  # connect/read timeouts, resets
+                error = GatewayError(f"{type(e).__name__}: {e}")
+                continue
+            if r.status_code == 429 or r.status_code >= 500:
+                error = GatewayError(f"Gateway returned {r.status_code}", r.status_code)
+                continue
+            if r.status_code >= 400:
+                self.failures += 1
+                raise GatewayError(f"Gateway returned {r.status_code}: {r.text[:200]}", r.status_code)
+            return r.json()
+        self.failures += 1
+        raise error
+
+    async def create_intent(self, amount, currency: str, idempotency_key: str, metadata: dict) -> dict:
+        return await self._request("POST", "/v1/payment_intents", json={
+            "amount": to_minor_units(amount),
+            "currency": currency.lower(),
+            "metadata": metadata,
+        }, idempotency_key=idempotency_key)
+
+    async def retrieve_intent(self, intent_id: str) -> dict:
+        return await self._request("GET", f"/v1/payment_intents/{intent_id}")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "retried": self.retried, "failures": self.failures}
+
+
+gateway = PaymentGateway()
@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+from passlib.context import CryptContext
+
+pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")  # process | thread | inline
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 8))
+HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+# Workers must not be forked from the threaded server, where another thread
+# may hold a lock (logging, the DB pool) at fork time and leave it held forever
+HASH_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def _hash(password: str) -> str:
+    return pwd_ctx.hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    return pwd_ctx.verify(password, password_hash)
+
+
+def _ready() -> bool:
+    return True
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited executor.
+
+    Callers block on the result, so at most `max_pending` request threads can
+    be tied up by hashing at any time; anything beyond that is rejected with
+    HashingBusy instead of queueing behind a login burst.
+    """
+
+    def __init__(self, kind: str = HASH_EXECUTOR, workers: int = HASH_WORKERS,
+                 max_pending: int = HASH_MAX_PENDING, timeout: float = HASH_TIMEOUT):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.busy_seconds = 0.0
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.kind == "inline":
+            return None
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "thread":
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="pwhash")
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, mp_context=multiprocessing.get_context(HASH_START_METHOD)
+                    )
+            return self._executor
+
+    def start(self):
+        """Create the pool and its workers now, so the first logins don't pay for it."""
+        executor = self._get_executor()
+        if isinstance(executor, ProcessPoolExecutor):
+            for f in [executor.submit(_ready) for _ in range(self.workers)]:
+                f.result(timeout=self.timeout)
+
+    def _run(self, fn: Callable, *args) -> Any:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy("Password hashing queue is full")
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return fn(*args)
+            try:
+                return executor.submit(fn, *args).result(timeout=self.timeout)
+            except FutureTimeout:
+                with self._lock:
+                    self.timeouts += 1
+                raise HashingBusy("Password hashing timed out")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.busy_seconds += time.perf_counter() - start
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return self._run(_verify, password, password_hash)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_ms": round(1000 * self.busy_seconds / self.completed, 2) if self.completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from .cache import LRUCache
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", 3600 * 24))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 10000))
+MAX_KEY_LENGTH = 255
+
+_PENDING = object()
+
+
+def fingerprint(payload: Any) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Remembers the response to each (scope, Idempotency-Key) so client retries
+    replay it instead of repeating the write.
+
+    A key is reserved before the handler runs and filled in once it succeeds;
+    a retry that arrives meanwhile gets 409, one with a different body gets
+    422. Failed requests release their key so the client can try again.
+    Keys live in a bounded LRU with a TTL and are local to this process.
+    """
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_MAX_KEYS, ttl: float = IDEMPOTENCY_TTL):
+        self._entries = LRUCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        self.replays = 0
+
+    def _begin(self, scope: str, key: str, digest: str) -> Optional[JSONResponse]:
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(400, "Idempotency-Key is too long")
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None:
+                self._entries.set((scope, key), (digest, _PENDING))
+                return None
+        stored_digest, response = entry
+        if stored_digest != digest:
+            raise HTTPException(422, "Idempotency-Key was already used with a different request")
+        if response is _PENDING:
+            raise HTTPException(409, "A request with this Idempotency-Key is still in progress")
+        self.replays += 1
+        status_code, body = response
+        return JSONResponse(body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+
+    def _finish(self, scope: str, key: str, digest: str, result: Any, status_code: int):
+        self._entries.set((scope, key), (digest, (status_code, jsonable_encoder(result))))
+
+    def _release(self, scope: str, key: str):
+        self._entries.pop((scope, key))
+
+    def run(self, scope: str, key: Optional[str], payload: Any,
+            handler: Callable[[], Any], status_code: int = 200) -> Any:
+        if not key:
+            return handler()
+        digest = fingerprint(payload)
+        replay = self._begin(scope, key, digest)
+        if replay is not None:
+            return replay
+        try:
+            result = handler()
+        except BaseException:
+            self._release(scope, key)
+            raise
+        self._finish(scope, key, digest, result, status_code)
+        return result
+
+    async def arun(self, scope: str, key: Optional[str], payload: Any,
+                   handler: Callable[[], Awaitable[Any]], status_code: int = 200) -> Any:
+        if not key:
+            return await handler()
+        digest = fingerprint(payload)
+        replay = self._begin(scope, key, digest)
+        if replay is not None:
+            return replay
+        try:
+            result = await handler()
+        except BaseException:
+            self._release(scope, key)
+            raise
+        self._finish(scope, key, digest, result, status_code)
+        return result
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return dict(self._entries.stats(), replays=self.replays)
+
+
+idempotency_store = IdempotencyStore()
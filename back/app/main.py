@@ -1,9 +1,17 @@
 import os
-import uvicorn
-from fastapi import FastAPI
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 
-from .database import Base, engine
+from . import archive, crud, fastjson, metrics, outbox, search
+from .compression import CompressionMiddleware
+from .gateway import PAYMENT_WEBHOOK_SECRET, gateway
+from .database import DB_ASYNC, Base, SessionLocal, engine, async_engine
+from .hashing import HashingBusy, password_hasher
 from .routers.auth       import router as auth_router
 from .routers.table      import router as table_router
 from .routers.menu       import router as menu_router
@@ -12,10 +20,20 @@ from .routers.payment    import router as payment_router
 from .routers.admin      import router as admin_router
 from .routers.admin_menu import router as admin_menu_router
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic (`python -m app.migrate`, once per deploy).
+# AUTO_CREATE_SCHEMA=1 builds it from the models at startup for local dev.
+AUTO_CREATE_SCHEMA = os.getenv("AUTO_CREATE_SCHEMA", "0") == "1"
 
-app = FastAPI(title="QR Ordering API")
+def create_schema():
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        search.install(conn)
+
+app = FastAPI(title="QR Ordering API", default_response_class=fastjson.default_response_class())
+
+# Per-route timing and SQL counts; innermost so it measures the app itself
+if os.getenv("METRICS", "1") == "1":
+    app.add_middleware(metrics.MetricsMiddleware)
 
 # CORS
 origins = os.getenv("CORS_ORIGINS", "*")
@@ -28,8 +46,104 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so it sees the final body and headers
+if os.getenv("COMPRESSION", "1") == "1":
+    app.add_middleware(CompressionMiddleware)
+
+@app.exception_handler(HashingBusy)
+def hashing_busy(request: Request, exc: HashingBusy):
+    # Shed auth load instead of letting it queue in the request thread pool
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+GUEST_PURGE_INTERVAL = int(os.getenv("GUEST_PURGE_INTERVAL", 3600))
+GUEST_PURGE_AGE = int(os.getenv("GUEST_PURGE_AGE", 3600 * 24))
+
+def purge_guests():
+    db = SessionLocal()
+    try:
+        return crud.purge_guest_accounts(db, datetime.utcnow() - timedelta(seconds=GUEST_PURGE_AGE))
+    finally:
+        db.close()
+
+async def purge_guests_periodically():
+    while True:
+        try:
+            await run_in_threadpool(purge_guests)
+        except Exception:
+            logging.getLogger(__name__).exception("Guest purge failed")
+        await asyncio.sleep(GUEST_PURGE_INTERVAL)
+
+async def archive_periodically():
+    while True:
+        await asyncio.sleep(archive.ARCHIVE_INTERVAL)
+        try:
+            await run_in_threadpool(archive.run)
+        except Exception:
+            logging.getLogger(__name__).exception("Archival failed")
+
+@app.on_event("startup")
+def auto_create_schema():
+    if AUTO_CREATE_SCHEMA:
+        create_schema()
+
+@app.on_event("startup")
+def start_password_hasher():
+    password_hasher.start()
+
+@app.on_event("startup")
+async def start_guest_purge():
+    if GUEST_PURGE_INTERVAL > 0:
+        app.state.guest_purge = asyncio.create_task(purge_guests_periodically())
+
+@app.on_event("startup")
+async def start_archival():
+    # Usually run from cron as `python -m app.archive`; ARCHIVE_INTERVAL runs it in-process
+    if archive.ARCHIVE_INTERVAL > 0:
+        app.state.archival = asyncio.create_task(archive_periodically())
+
+@app.on_event("startup")
+async def start_outbox_worker():
+    # OUTBOX_WORKER=off when `python -m app.outbox_worker` runs as its own process;
+    # with no handlers registered nothing is enqueued, so there is nothing to drain
+    if outbox.OUTBOX_WORKER == "inline" and outbox.has_handlers():
+        app.state.outbox_worker = asyncio.create_task(outbox.worker.run())
+
+@app.on_event("shutdown")
+def shutdown_background():
+    for name in ("guest_purge", "outbox_worker", "archival"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
+@app.on_event("startup")
+def check_payment_webhook():
+    if not PAYMENT_WEBHOOK_SECRET:
+        logging.getLogger(__name__).warning(
+            "PAYMENT_WEBHOOK_SECRET is not set; /api/payments/webhook will reject every event"
+        )
+
+@app.on_event("shutdown")
+async def close_payment_gateway():
+    await gateway.aclose()
 
-# include routers
+# include routers; async variants go first so they shadow their sync twins
+if DB_ASYNC:
+    from .routers.menu_async  import router as menu_async_router
+    from .routers.table_async import router as table_async_router
+    from .routers.order_async import router as order_async_router
+    app.include_router(menu_async_router)
+    app.include_router(table_async_router)
+    app.include_router(order_async_router)
 app.include_router(auth_router)
 app.include_router(table_router)
 app.include_router(menu_router)
@@ -39,4 +153,6 @@ app.include_router(admin_router)
 app.include_router(admin_menu_router)
 
 if __name__ == "__main__":
+    import uvicorn  # only the dev runner needs it
+    os.environ.setdefault("AUTO_CREATE_SCHEMA", "1")
     uvicorn.run("app.main:app", host="0.0.0.0", port=int(os.getenv("PORT",8000)), reload=True)
\ No newline at end of file
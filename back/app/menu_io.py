@@ -0,0 +1,103 @@
+import codecs
+import csv
+import io
+import json
+from typing import Iterable, Iterator, Tuple, Union
+
+import anyio.from_thread
+from fastapi import Request
+
+# Wire formats for bulk menu import / export
+CSV = "csv"
+JSONL = "jsonl"
+MEDIA_TYPES = {CSV: "text/csv", JSONL: "application/x-ndjson"}
+CSV_FIELDS = ["id", "name", "description", "price", "category", "available"]
+
+Row = Tuple[int, Union[dict, Exception]]
+
+
+def format_for(content_type: str) -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return CSV
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/json-lines", "application/json"):
+        return JSONL
+    raise ValueError(f"Unsupported content type {content_type!r}; send text/csv or application/x-ndjson")
+
+
+async def _next_chunk(chunks):
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def request_lines(request: Request) -> Iterator[str]:
+    """
+    Body lines, read incrementally. Call from the route's worker thread;
+    chunks are pulled from the event loop, so the body is never buffered
+    whole.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    chunks = request.stream().__aiter__()
+    pending = ""
+    while True:
+        chunk = anyio.from_thread.run(_next_chunk, chunks)
+        if chunk is None:
+            break
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _blank_to_none(record: dict) -> dict:
+    # CSV has no null: empty cells mean "not given"
+    return {k: v for k, v in record.items() if k and v not in ("", None)}
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[Row]:
+    reader = csv.DictReader(lines)
+    for record in reader:
+        if None in record:
+            yield reader.line_num, ValueError("Too many columns")
+            continue
+        yield reader.line_num, _blank_to_none(record)
+
+
+def parse_jsonl(lines: Iterable[str]) -> Iterator[Row]:
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_no, ValueError("Expected a JSON object")
+            continue
+        yield line_no, record
+
+
+def parse(lines: Iterable[str], fmt: str) -> Iterator[Row]:
+    return parse_csv(lines) if fmt == CSV else parse_jsonl(lines)
+
+
+def dump(items: Iterable[dict], fmt: str) -> Iterator[str]:
+    if fmt == JSONL:
+        for item in items:
+            yield json.dumps(item) + "\n"
+        return
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, CSV_FIELDS)
+    writer.writeheader()
+    for item in items:
+        writer.writerow(item)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
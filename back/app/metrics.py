@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .database import Base
+
+SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "1") == "1"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    rows: int = 0
+
+
+# Stats of the request (or query_budget block) running in this context.
+# Sync routes run in a worker thread with a copy of the context, so they
+# share the same RequestStats object.
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+# --- SQLAlchemy hooks: every engine, sync or async ---
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None or context is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += time.perf_counter() - getattr(context, "_metrics_start", time.perf_counter())
+
+
+@event.listens_for(Base, "load", propagate=True)
+def _on_load(target, context):
+    # ORM rows materialized; Core row reads (the FAST_JSON path) are not counted
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+class _RouteMetrics:
+    __slots__ = ("count", "errors", "buckets", "seconds", "db_seconds", "queries", "rows", "max_queries")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.seconds = 0.0
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.max_queries = 0
+
+
+class MetricsRegistry:
+    """Per-route request totals, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, RequestStats], None]] = []
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        with self._lock:
+            m = self._routes.get((method, route))
+            if m is None:
+                m = self._routes[(method, route)] = _RouteMetrics()
+            m.count += 1
+            m.errors += status >= 500
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    m.buckets[i] += 1
+            m.seconds += seconds
+            m.db_seconds += stats.db_seconds
+            m.queries += stats.queries
+            m.rows += stats.rows
+            m.max_queries = max(m.max_queries, stats.queries)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(f"{method} {route}", stats)
+
+    def render(self) -> str:
+        lines = []
+
+        def family(name, kind, help_):
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            routes = sorted(self._routes.items())
+            family("http_request_duration_seconds", "histogram", "Wall time per request")
+            for (method, route), m in routes:
+                labels = f'method="{method}",route="{route}"'
+                for bound, n in zip(LATENCY_BUCKETS, m.buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {n}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {m.count}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {m.seconds:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {m.count}")
+            for name, help_, attr in (
+                ("http_request_errors_total", "Requests answered with a 5xx status", "errors"),
+                ("http_request_db_seconds_total", "Time spent executing SQL", "db_seconds"),
+                ("http_request_queries_total", "SQL statements executed", "queries"),
+                ("http_request_rows_total", "ORM rows loaded", "rows"),
+                ("http_request_max_queries", "Most SQL statements seen in one request", "max_queries"),
+            ):
+                family(name, "gauge" if attr == "max_queries" else "counter", help_)
+                for (method, route), m in routes:
+                    lines.append(f'{name}{{method="{method}",route="{route}"}} {getattr(m, attr)}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    @contextmanager
+    def listen(self, listener: Callable[[str, RequestStats], None]):
+        with self._lock:
+            self._listeners.append(listener)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._listeners.remove(listener)
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Times each request, collects its SQL stats and adds a Server-Timing header."""
+
+    def __init__(self, app: ASGIApp, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    MutableHeaders(raw=message["headers"]).append(
+                        "Server-Timing",
+                        f'app;dur={elapsed:.1f}, db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"',
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            registry.observe(scope["method"], route, status, time.perf_counter() - start, stats)
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Assert that no request served inside the block, and the block's own
+    direct calls, run more than ``max_queries`` SQL statements.
+
+        with query_budget(2):
+            client.get("/api/restaurants/1/menu")
+    """
+    over: List[str] = []
+    own = RequestStats()
+
+    def check(label: str, stats: RequestStats):
+        if stats.queries > max_queries:
+            over.append(f"{label} ran {stats.queries} queries")
+
+    token = _current.set(own)
+    try:
+        with registry.listen(check):
+            yield own
+    finally:
+        _current.reset(token)
+    check("block", own)
+    if over:
+        raise AssertionError(f"query budget of {max_queries} exceeded: " + "; ".join(over))
@@ -0,0 +1,49 @@
+"""
+Apply Alembic migrations once per deploy, before workers start.
+
+    python -m app.migrate            # upgrade to head
+    python -m app.migrate <revision>
+
+Safe to run from every container's entrypoint: on Postgres an advisory lock
+makes concurrent runners wait for the first one, which leaves the rest
+with nothing to do.
+"""
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+
+from .database import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+MIGRATION_LOCK_ID = 72_410_019
+
+
+def alembic_config() -> Config:
+    cfg = Config(ALEMBIC_INI)
+    cfg.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic"))
+    return cfg
+
+
+def upgrade(revision: str = "head"):
+    # Autocommit so the lock connection holds no transaction open while migrating
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if engine.dialect.name == "postgresql":
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            tables = set(inspect(engine).get_table_names())
+            if tables and "alembic_version" not in tables:
+                raise SystemExit(
+                    "Database has tables but no alembic_version; it was built by create_all. "
+                    "Record its revision with `alembic stamp <revision>` and re-run."
+                )
+            command.upgrade(alembic_config(), revision)
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+
+if __name__ == "__main__":
+    upgrade(sys.argv[1] if len(sys.argv) > 1 else "head")
@@ -2,7 +2,7 @@ import enum
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Text, Numeric, Boolean,
-    DateTime, Enum, ForeignKey
+    DateTime, Enum, ForeignKey, Index, and_
 )
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -66,6 +66,10 @@ class Table(Base):
     number        = Column(String, nullable=False)
     location      = Column(String)
 
+    __table_args__ = (
+        Index("ix_tables_restaurant_number", "restaurant_id", "number"),
+    )
+
     # Relationships
     restaurant = relationship("Restaurant", back_populates="tables")
     sessions   = relationship("Session", back_populates="table", cascade="all,delete")
@@ -81,6 +85,13 @@ class Session(Base):
     start_time     = Column(DateTime, default=datetime.utcnow)
     end_time       = Column(DateTime)
 
+    __table_args__ = (
+        Index("ix_sessions_table_end_start", "table_id", "end_time", "start_time"),
+        # Partial index: only open sessions, which is what QR scans look up
+        Index("ix_sessions_active", "table_id", "start_time",
+              sqlite_where=end_time.is_(None), postgresql_where=end_time.is_(None)),
+    )
+
     # Relationships
     restaurant = relationship("Restaurant")
     table      = relationship("Table", back_populates="sessions")
@@ -98,6 +109,10 @@ class MenuItem(Base):
     category      = Column(String, nullable=False)
     available     = Column(Boolean, default=True)
 
+    __table_args__ = (
+        Index("ix_menu_restaurant_available_category", "restaurant_id", "available", "category"),
+    )
+
     # Relationships
     restaurant = relationship("Restaurant", back_populates="menu")
     order_items = relationship("OrderItem", back_populates="menu_item")
@@ -115,6 +130,11 @@ class Order(Base):
     created_at     = Column(DateTime, default=datetime.utcnow)
     paid_at        = Column(DateTime)
 
+    __table_args__ = (
+        Index("ix_orders_restaurant_status_created", "restaurant_id", "status", "created_at"),
+        Index("ix_orders_restaurant_created", "restaurant_id", "created_at", "id"),
+    )
+
     # Relationships
     restaurant = relationship("Restaurant", back_populates="orders")
     table      = relationship("Table", back_populates="orders")
@@ -132,6 +152,10 @@ class OrderItem(Base):
     unit_price           = Column(Numeric(8,2), nullable=False)
     special_instructions = Column(Text)
 
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
+
     # Relationships
     order      = relationship("Order", back_populates="items")
     menu_item  = relationship("MenuItem", back_populates="order_items")
@@ -148,6 +172,114 @@ class Payment(Base):
     status         = Column(String, default="pending")
     created_at     = Column(DateTime, default=datetime.utcnow)
 
+# --- Outbox ---
+class OutboxMessage(Base):
+    # Side effects recorded in the same transaction as the write that causes them
+    __tablename__ = "outbox"
+    id           = Column(Integer, primary_key=True)
+    topic        = Column(String, nullable=False)
+    payload      = Column(Text, nullable=False)  # JSON
+    created_at   = Column(DateTime, default=datetime.utcnow, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    attempts     = Column(Integer, default=0, nullable=False)
+    claim_token  = Column(String)
+    last_error   = Column(Text)
+    processed_at = Column(DateTime)
+    failed_at    = Column(DateTime)
+
+    __table_args__ = (
+        # Drain query: pending messages that are due, oldest first
+        Index("ix_outbox_pending", "available_at", "id",
+              sqlite_where=and_(processed_at.is_(None), failed_at.is_(None)),
+              postgresql_where=and_(processed_at.is_(None), failed_at.is_(None))),
+        Index("ix_outbox_claim_token", "claim_token"),
+    )
+
+# --- Sales rollups ---
+# Incremental aggregates for owner dashboards; see app/rollups.py.
+# Buckets are UTC hour/day starts. Placed and cancelled orders count at
+# created_at, paid orders at paid_at.
+class SalesRollup(Base):
+    __tablename__ = "sales_rollups"
+    restaurant_id    = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    grain            = Column(String, primary_key=True)  # "hour" | "day"
+    bucket           = Column(DateTime, primary_key=True)
+    orders           = Column(Integer, default=0, nullable=False)
+    gross            = Column(Numeric(12,2), default=0, nullable=False)  # total of orders placed
+    paid_orders      = Column(Integer, default=0, nullable=False)
+    revenue          = Column(Numeric(12,2), default=0, nullable=False)  # total of orders paid
+    cancelled_orders = Column(Integer, default=0, nullable=False)
+    cancelled_amount = Column(Numeric(12,2), default=0, nullable=False)
+
+class ItemSalesRollup(Base):
+    __tablename__ = "item_sales_rollups"
+    restaurant_id      = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    grain              = Column(String, primary_key=True)
+    bucket             = Column(DateTime, primary_key=True)
+    menu_id            = Column(Integer, ForeignKey("menu.id", ondelete="CASCADE"), primary_key=True)
+    quantity           = Column(Integer, default=0, nullable=False)
+    gross              = Column(Numeric(12,2), default=0, nullable=False)  # before tax
+    paid_quantity      = Column(Integer, default=0, nullable=False)
+    revenue            = Column(Numeric(12,2), default=0, nullable=False)
+    cancelled_quantity = Column(Integer, default=0, nullable=False)
+    cancelled_amount   = Column(Numeric(12,2), default=0, nullable=False)
+
+# --- Archive ---
+# Cold copies of closed orders (with their items and payments) and ended
+# sessions, moved out of the hot tables by app/archive.py. No foreign keys,
+# so archived rows never hold up deletes elsewhere; status is plain text.
+class OrderArchive(Base):
+    __tablename__ = "orders_archive"
+    id             = Column(Integer, primary_key=True)
+    restaurant_id  = Column(Integer, nullable=False)
+    table_id       = Column(Integer, nullable=False)
+    session_id     = Column(Integer, nullable=False)
+    client_id      = Column(Integer)
+    status         = Column(String, nullable=False)
+    total_amount   = Column(Numeric(10,2), nullable=False)
+    created_at     = Column(DateTime)
+    paid_at        = Column(DateTime)
+    archived_at    = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_orders_archive_restaurant_created", "restaurant_id", "created_at"),
+    )
+
+    items = relationship("OrderItemArchive", primaryjoin="OrderArchive.id == foreign(OrderItemArchive.order_id)",
+                         order_by="OrderItemArchive.id", viewonly=True)
+    payments = relationship("PaymentArchive", primaryjoin="OrderArchive.id == foreign(PaymentArchive.order_id)",
+                            order_by="PaymentArchive.id", viewonly=True)
+
+class OrderItemArchive(Base):
+    __tablename__ = "order_items_archive"
+    id                   = Column(Integer, primary_key=True)
+    order_id             = Column(Integer, nullable=False, index=True)
+    menu_id              = Column(Integer, nullable=False)
+    quantity             = Column(Integer, nullable=False)
+    unit_price           = Column(Numeric(8,2), nullable=False)
+    special_instructions = Column(Text)
+
+class PaymentArchive(Base):
+    __tablename__ = "payments_archive"
+    id             = Column(Integer, primary_key=True)
+    order_id       = Column(Integer, nullable=False, index=True)
+    payment_method = Column(String, nullable=False)
+    amount         = Column(Numeric(10,2), nullable=False)
+    currency       = Column(String)
+    intent_id      = Column(String)
+    status         = Column(String)
+    created_at     = Column(DateTime)
+
+class SessionArchive(Base):
+    __tablename__ = "sessions_archive"
+    id             = Column(Integer, primary_key=True)
+    restaurant_id  = Column(Integer, nullable=False)
+    table_id       = Column(Integer, nullable=False)
+    user_id        = Column(Integer)
+    start_time     = Column(DateTime)
+    end_time       = Column(DateTime)
+    archived_at    = Column(DateTime, nullable=False)
+
 # --- Auth ---
 class RegisterIn(BaseModel):
     name: str
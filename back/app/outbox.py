@@ -0,0 +1,265 @@
+"""
+Transactional outbox for order side effects.
+
+Writes that have slow consequences (kitchen tickets, notifications,
+analytics) insert an outbox row in their own transaction instead of doing
+the work inline. A worker claims due rows in batches, runs the handlers
+registered for the topic and marks them processed; failures are retried
+with exponential backoff until OUTBOX_MAX_ATTEMPTS. Claims are leases, so
+rows held by a worker that died are picked up again once the lease ends.
+Delivery is at-least-once: handlers must tolerate repeats. Topics nobody
+handles are not written at all, and with no handlers registered the worker
+does not start. An idle worker polls less and less often, up to
+OUTBOX_MAX_POLL_INTERVAL; commits in the same process wake it at once.
+
+The API runs the worker as an asyncio task (OUTBOX_WORKER=inline). To run
+it as its own process instead, set OUTBOX_WORKER=off for the API and start
+
+    python -m app.outbox_worker
+
+Handlers live in app.outbox_handlers, which both import. Order events for a
+Redis event broker are one of them, so a standalone worker that polls
+slowly delays live updates: keep OUTBOX_MAX_POLL_INTERVAL short there.
+"""
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import bindparam, delete, func, select, update
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+from .database import SessionLocal
+
+OUTBOX_WORKER = os.getenv("OUTBOX_WORKER", "inline")  # inline | off
+OUTBOX_BATCH = int(os.getenv("OUTBOX_BATCH", 100))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 1))
+OUTBOX_MAX_POLL_INTERVAL = float(os.getenv("OUTBOX_MAX_POLL_INTERVAL", 30))  # when idle
+OUTBOX_LEASE = float(os.getenv("OUTBOX_LEASE", 60))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", 300))
+OUTBOX_RETENTION = float(os.getenv("OUTBOX_RETENTION", 3600 * 24 * 7))
+OUTBOX_PURGE_INTERVAL = float(os.getenv("OUTBOX_PURGE_INTERVAL", 3600))
+# Optional: POST every message to this URL (printer bridge, notifier, ...)
+OUTBOX_WEBHOOK_URL = os.getenv("OUTBOX_WEBHOOK_URL", "")
+OUTBOX_WEBHOOK_TIMEOUT = float(os.getenv("OUTBOX_WEBHOOK_TIMEOUT", 5))
+
+log = logging.getLogger(__name__)
+outbox = models.OutboxMessage.__table__
+
+Handler = Callable[[str, dict], None]
+_handlers: Dict[str, List[Handler]] = {}
+
+
+def handler(*topics: str):
+    """Register a function(topic, payload) to run for messages on ``topics`` ("*" for all)."""
+    def register(fn: Handler) -> Handler:
+        for topic in topics:
+            _handlers.setdefault(topic, []).append(fn)
+        return fn
+    return register
+
+
+def has_handlers() -> bool:
+    return any(_handlers.values())
+
+
+def handles(topic: str) -> bool:
+    # Whether writing a message for ``topic`` would do anything
+    return bool(_handlers.get(topic) or _handlers.get("*"))
+
+
+def message(topic: str, payload: dict) -> dict:
+    # Row for outbox.insert(); execute it in the transaction making the change
+    now = datetime.utcnow()
+    return {
+        "topic": topic,
+        "payload": json.dumps(jsonable_encoder(payload)),
+        "created_at": now,
+        "available_at": now,
+        "attempts": 0,
+    }
+
+
+def backoff(attempts: int) -> float:
+    return min(2 ** attempts, OUTBOX_MAX_BACKOFF)
+
+
+def claim(db, limit: int = OUTBOX_BATCH):
+    # One UPDATE stamps a batch of due rows with our token and a lease, so
+    # concurrent workers never share a row; Postgres also skips locked rows
+    token = secrets.token_hex(16)
+    now = datetime.utcnow()
+    due = (
+        select(outbox.c.id)
+        .where(outbox.c.processed_at.is_(None), outbox.c.failed_at.is_(None),
+               outbox.c.available_at <= now)
+        .order_by(outbox.c.available_at, outbox.c.id)
+        .limit(limit)
+    )
+    # Read first: an empty poll must not take the SQLite write lock
+    if db.execute(due.limit(1)).first() is None:
+        db.rollback()
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        due = due.with_for_update(skip_locked=True)
+    db.execute(
+        update(outbox)
+        .where(outbox.c.id.in_(due))
+        .values(claim_token=token, available_at=now + timedelta(seconds=OUTBOX_LEASE),
+                attempts=outbox.c.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return db.execute(
+        select(outbox.c.id, outbox.c.topic, outbox.c.payload, outbox.c.attempts)
+        .where(outbox.c.claim_token == token)
+        .order_by(outbox.c.id)
+    ).all()
+
+
+def deliver(topic: str, payload: dict):
+    for fn in _handlers.get(topic, []) + _handlers.get("*", []):
+        fn(topic, payload)
+
+
+def drain(limit: int = OUTBOX_BATCH) -> int:
+    """Process one batch; returns how many messages were claimed."""
+    db = SessionLocal()
+    try:
+        batch = claim(db, limit)
+        if not batch:
+            return 0
+        done, retry, dead = [], [], []
+        for msg in batch:
+            try:
+                deliver(msg.topic, json.loads(msg.payload))
+                done.append(msg.id)
+            except Exception as e:
+                log.warning("Outbox message %s (%s) failed, attempt %s: %s", msg.id, msg.topic, msg.attempts, e)
+                error = f"{type(e).__name__}: {e}"[:2000]
+                if msg.attempts >= OUTBOX_MAX_ATTEMPTS:
+                    dead.append({"msg_id": msg.id, "error": error})
+                else:
+                    retry_at = datetime.utcnow() + timedelta(seconds=backoff(msg.attempts))
+                    retry.append({"msg_id": msg.id, "error": error, "retry_at": retry_at})
+
+        now = datetime.utcnow()
+        by_id = outbox.c.id == bindparam("msg_id")
+        if done:
+            db.execute(update(outbox).where(outbox.c.id.in_(done))
+                       .values(processed_at=now, claim_token=None, last_error=None))
+        if retry:
+            db.execute(update(outbox).where(by_id).values(
+                available_at=bindparam("retry_at"), last_error=bindparam("error"), claim_token=None
+            ), retry)
+        if dead:
+            db.execute(update(outbox).where(by_id).values(
+                failed_at=now, last_error=bindparam("error"), claim_token=None
+            ), dead)
+        db.commit()
+        return len(batch)
+    finally:
+        db.close()
+
+
+def purge_processed(older_than: datetime) -> int:
+    db = SessionLocal()
+    try:
+        n = db.execute(delete(outbox).where(outbox.c.processed_at < older_than)).rowcount
+        db.commit()
+        return n
+    finally:
+        db.close()
+
+
+def stats(db) -> dict:
+    pending = outbox.c.processed_at.is_(None) & outbox.c.failed_at.is_(None)
+    row = db.execute(select(
+        func.count().filter(pending),
+        func.count().filter(outbox.c.failed_at.is_not(None)),
+        func.min(outbox.c.created_at).filter(pending),
+    ).select_from(outbox)).one()
+    oldest = row[2]
+    return {
+        "pending": row[0],
+        "failed": row[1],
+        "oldest_pending_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else None,
+    }
+
+
+class OutboxWorker:
+    """Drains the outbox on this process's event loop."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_purge = 0.0
+
+    def notify(self):
+        # Thread-safe nudge after a commit that enqueued something
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _purge_due(self) -> bool:
+        if time.monotonic() - self._last_purge < OUTBOX_PURGE_INTERVAL:
+            return False
+        self._last_purge = time.monotonic()
+        return True
+
+    def _purge(self):
+        purge_processed(datetime.utcnow() - timedelta(seconds=OUTBOX_RETENTION))
+
+    @staticmethod
+    def _idle_wait(idle_polls: int) -> float:
+        return min(OUTBOX_POLL_INTERVAL * 2 ** min(idle_polls, 16), OUTBOX_MAX_POLL_INTERVAL)
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        idle = 0
+        try:
+            while True:
+                self._wakeup.clear()
+                try:
+                    n = await run_in_threadpool(drain)
+                    if self._purge_due():
+                        await run_in_threadpool(self._purge)
+                except Exception:
+                    log.exception("Outbox drain failed")
+                    n = 0
+                if n >= OUTBOX_BATCH:
+                    continue
+                idle = 0 if n else idle + 1
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._idle_wait(idle))
+                    idle = 0
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._loop = None
+
+    def run_forever(self):
+        # Standalone process: same loop, polling only
+        idle = 0
+        while True:
+            try:
+                n = drain()
+                if self._purge_due():
+                    self._purge()
+            except Exception:
+                log.exception("Outbox drain failed")
+                n = 0
+            if n < OUTBOX_BATCH:
+                idle = 0 if n else idle + 1
+                time.sleep(self._idle_wait(idle))
+
+
+worker = OutboxWorker()
+notify = worker.notify
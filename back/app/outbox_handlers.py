@@ -0,0 +1,32 @@
+"""
+Outbox handlers.
+
+Imported by crud, so the API only enqueues topics someone handles, and by
+app.outbox_worker, so a standalone worker runs the same handlers.
+"""
+from . import events
+from .outbox import OUTBOX_WEBHOOK_TIMEOUT, OUTBOX_WEBHOOK_URL, handler
+
+
+def publish_order_event(topic: str, payload: dict):
+    # Same event the API would publish inline; broker errors raise, so the
+    # message is retried
+    data = dict(payload)
+    channels = [events.restaurant_channel(data.pop("restaurant_id"))]
+    if topic == "order.status_changed":
+        channels.append(events.order_channel(data["order_id"]))
+    for channel in channels:
+        events.broker.publish(channel, topic, data)
+
+
+if events.PUBLISH_VIA_OUTBOX:
+    handler("order.created", "order.status_changed")(publish_order_event)
+
+if OUTBOX_WEBHOOK_URL:
+    @handler("*")
+    def post_to_webhook(topic: str, payload: dict):
+        import httpx
+
+        r = httpx.post(OUTBOX_WEBHOOK_URL, json={"topic": topic, "payload": payload},
+                       timeout=OUTBOX_WEBHOOK_TIMEOUT)
+        r.raise_for_status()
@@ -0,0 +1,21 @@
+"""
+Standalone outbox worker, for when the API runs with OUTBOX_WORKER=off:
+
+    python -m app.outbox_worker
+
+Its own module rather than app.outbox's __main__ block, so handlers
+registered on app.outbox from other modules are the ones it runs.
+"""
+import logging
+
+from . import outbox
+from . import outbox_handlers  # noqa: F401  (registers handlers)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not outbox.has_handlers():
+        raise SystemExit("No outbox handlers are registered (set OUTBOX_WEBHOOK_URL)")
+    try:
+        outbox.worker.run_forever()
+    except KeyboardInterrupt:
+        pass
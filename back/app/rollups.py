@@ -0,0 +1,317 @@
+"""
+Sales rollups for owner dashboards.
+
+Order writes add signed increments to hourly and daily buckets per
+restaurant (sales_rollups) and per menu item (item_sales_rollups) in the
+same transaction, so dashboard reads scan buckets instead of order history.
+
+    python -m app.rollups rebuild            # every restaurant
+    python -m app.rollups rebuild 3 7        # just these
+
+recomputes rollups from orders (backfill after migrating, or repair).
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, cast, delete, func, select, text, union_all
+
+from . import models
+from .database import SessionLocal
+
+REBUILD_FLUSH_ROWS = int(os.getenv("ROLLUP_REBUILD_FLUSH_ROWS", 20000))
+MAX_BUCKETS = int(os.getenv("ROLLUP_MAX_BUCKETS", 24 * 31))
+
+HOUR, DAY = "hour", "day"
+GRAINS = {HOUR: timedelta(hours=1), DAY: timedelta(days=1)}
+
+# Order events and the (count, amount) counters each one moves
+PLACED, PAID, CANCELLED = "placed", "paid", "cancelled"
+SALES_COLUMNS = {PLACED: ("orders", "gross"), PAID: ("paid_orders", "revenue"),
+                 CANCELLED: ("cancelled_orders", "cancelled_amount")}
+ITEM_COLUMNS = {PLACED: ("quantity", "gross"), PAID: ("paid_quantity", "revenue"),
+                CANCELLED: ("cancelled_quantity", "cancelled_amount")}
+SALES_COUNTERS = [c for pair in SALES_COLUMNS.values() for c in pair]
+ITEM_COUNTERS = [c for pair in ITEM_COLUMNS.values() for c in pair]
+
+sales = models.SalesRollup.__table__
+item_sales = models.ItemSalesRollup.__table__
+CENT = Decimal("0.01")
+
+
+def truncate(at: datetime, grain: str) -> datetime:
+    at = at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0) if grain == DAY else at
+
+
+def event_time(kind: str, created_at: datetime, paid_at: Optional[datetime]) -> datetime:
+    # There is no cancelled_at, so cancellations stay with the day the order was placed
+    return (paid_at or created_at) if kind == PAID else created_at
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value)).quantize(CENT)
+
+
+class Deltas:
+    """Increments keyed by rollup primary key, merged before they are written."""
+
+    def __init__(self):
+        self.sales: Dict[tuple, dict] = {}
+        self.items: Dict[tuple, dict] = {}
+
+    def __len__(self):
+        return len(self.sales) + len(self.items)
+
+    @staticmethod
+    def _row(rows: dict, key: tuple, names: tuple, counters: List[str]) -> dict:
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = dict(zip(names, key))
+            row.update((c, 0) for c in counters)
+        return row
+
+    def add(self, kind: str, restaurant_id: int, at: datetime, total, lines: Iterable, sign: int = 1):
+        """
+        Record one order event. ``lines`` are mappings with menu_id,
+        quantity and unit_price; ``sign=-1`` reverses an earlier event.
+        """
+        lines = list(lines)
+        count_col, amount_col = SALES_COLUMNS[kind]
+        qty_col, line_amount_col = ITEM_COLUMNS[kind]
+        total = _money(total)
+        for grain in GRAINS:
+            bucket = truncate(at, grain)
+            row = self._row(self.sales, (restaurant_id, grain, bucket),
+                            ("restaurant_id", "grain", "bucket"), SALES_COUNTERS)
+            row[count_col] += sign
+            row[amount_col] += sign * total
+            for line in lines:
+                row = self._row(self.items, (restaurant_id, grain, bucket, line["menu_id"]),
+                                ("restaurant_id", "grain", "bucket", "menu_id"), ITEM_COUNTERS)
+                row[qty_col] += sign * line["quantity"]
+                row[line_amount_col] += sign * line["quantity"] * _money(line["unit_price"])
+
+    def statements(self, dialect) -> List[Tuple[object, List[dict]]]:
+        # Sorted so concurrent writers lock rollup rows in the same order
+        out = []
+        for table, rows, counters in ((sales, self.sales, SALES_COUNTERS),
+                                      (item_sales, self.items, ITEM_COUNTERS)):
+            if rows:
+                out.append((upsert(dialect, table, counters), [rows[k] for k in sorted(rows)]))
+        return out
+
+
+def upsert(dialect, table, counters: List[str]):
+    if dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[c.name for c in table.primary_key],
+        set_={c: table.c[c] + stmt.excluded[c] for c in counters},
+    )
+
+
+def _dialect(db):
+    # Session or Connection
+    return getattr(db, "dialect", None) or db.get_bind().dialect
+
+
+def apply(db, deltas: Deltas):
+    for stmt, rows in deltas.statements(_dialect(db)):
+        db.execute(stmt, rows)
+
+
+async def aapply(db, deltas: Deltas):
+    for stmt, rows in deltas.statements(db.get_bind().dialect):
+        await db.execute(stmt, rows)
+
+
+def order_placed(restaurant_id: int, created_at: datetime, total, lines: Iterable) -> Deltas:
+    deltas = Deltas()
+    deltas.add(PLACED, restaurant_id, created_at, total, lines)
+    return deltas
+
+
+def order_lines_stmt(order_id: int):
+    oi = models.OrderItem.__table__
+    return select(oi.c.menu_id, oi.c.quantity, oi.c.unit_price).where(oi.c.order_id == order_id)
+
+
+def record_status_change(db, order: models.Order, previous: models.OrderStatusEnum):
+    """Move an order's totals into or out of the paid/cancelled counters; caller commits."""
+    changes = []
+    for kind, status in ((PAID, models.OrderStatusEnum.paid), (CANCELLED, models.OrderStatusEnum.cancelled)):
+        was, now = previous == status, order.status == status
+        if was != now:
+            changes.append((kind, 1 if now else -1))
+    if not changes:
+        return
+    lines = db.execute(order_lines_stmt(order.id)).mappings().all()
+    deltas = Deltas()
+    for kind, sign in changes:
+        deltas.add(kind, order.restaurant_id, event_time(kind, order.created_at, order.paid_at),
+                   order.total_amount, lines, sign)
+    apply(db, deltas)
+
+
+# --- Rebuild ---
+def rebuild(db, restaurant_id: int) -> int:
+    """
+    Recompute one restaurant's rollups from its orders, archived ones
+    included, in the caller's transaction; returns the number of orders
+    read. On Postgres the rollup tables are locked for the duration, so
+    concurrent order writes wait rather than being lost or counted twice.
+    """
+    dialect = _dialect(db)
+    if dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE sales_rollups, item_sales_rollups IN EXCLUSIVE MODE"))
+    # Delete first: on SQLite that takes the write lock before orders are read
+    for table in (sales, item_sales):
+        db.execute(delete(table).where(table.c.restaurant_id == restaurant_id))
+
+    # Hot and archived orders in one statement, so an archival batch
+    # committing mid-rebuild can't hide or double an order
+    history = union_all(*(
+        select(o.c.id, cast(o.c.status, String).label("status"), o.c.total_amount, o.c.created_at,
+               o.c.paid_at, oi.c.menu_id, oi.c.quantity, oi.c.unit_price)
+        .select_from(o.outerjoin(oi, oi.c.order_id == o.c.id))
+        .where(o.c.restaurant_id == restaurant_id)
+        for o, oi in ((models.Order.__table__, models.OrderItem.__table__),
+                      (models.OrderArchive.__table__, models.OrderItemArchive.__table__))
+    )).subquery()
+    rows = db.execute(
+        select(history).order_by(history.c.id).execution_options(stream_results=True)
+    )
+    deltas, orders = Deltas(), 0
+    for _, group in groupby(rows, key=lambda r: r.id):
+        group = list(group)
+        head = group[0]
+        lines = [r._mapping for r in group if r.menu_id is not None]
+        deltas.add(PLACED, restaurant_id, head.created_at, head.total_amount, lines)
+        if head.status == models.OrderStatusEnum.paid:
+            deltas.add(PAID, restaurant_id, event_time(PAID, head.created_at, head.paid_at),
+                       head.total_amount, lines)
+        elif head.status == models.OrderStatusEnum.cancelled:
+            deltas.add(CANCELLED, restaurant_id, head.created_at, head.total_amount, lines)
+        orders += 1
+        # Upserts add up, so partial batches can be flushed as they fill
+        if len(deltas) >= REBUILD_FLUSH_ROWS:
+            apply(db, deltas)
+            deltas = Deltas()
+    apply(db, deltas)
+    return orders
+
+
+def rebuild_all(restaurant_ids: Optional[List[int]] = None):
+    db = SessionLocal()
+    try:
+        if not restaurant_ids:
+            restaurant_ids = db.execute(select(models.Restaurant.id).order_by(models.Restaurant.id)).scalars().all()
+        for rid in restaurant_ids:
+            orders = rebuild(db, rid)
+            db.commit()
+            print(f"restaurant {rid}: {orders} orders")
+    finally:
+        db.close()
+
+
+# --- Dashboard reads (rollups only) ---
+def _naive_utc(at: Optional[datetime]) -> Optional[datetime]:
+    # Timestamps are stored as naive UTC
+    if at is not None and at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+
+def _window(grain: str, start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    if grain not in GRAINS:
+        raise ValueError("grain must be hour or day")
+    step = GRAINS[grain]
+    start, end = _naive_utc(start), _naive_utc(end)
+    end = truncate(end or datetime.utcnow(), grain) + step  # include the current bucket
+    start = truncate(start, grain) if start else end - (24 if grain == HOUR else 7) * step
+    if start >= end:
+        raise ValueError("start must be before end")
+    if (end - start) / step > MAX_BUCKETS:
+        raise ValueError(f"At most {MAX_BUCKETS} {grain} buckets per request")
+    return start, end
+
+
+def _totals(row) -> dict:
+    out = {c: row[c] or 0 for c in SALES_COUNTERS}
+    for c in ("gross", "revenue", "cancelled_amount"):
+        out[c] = float(out[c])
+    out["average_ticket"] = round(out["revenue"] / out["paid_orders"], 2) if out["paid_orders"] else None
+    return out
+
+
+def sales_series(db, restaurant_id: int, grain: str = DAY,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None) -> dict:
+    start, end = _window(grain, start, end)
+    rows = db.execute(
+        select(sales.c.bucket, *(sales.c[c] for c in SALES_COUNTERS))
+        .where(sales.c.restaurant_id == restaurant_id, sales.c.grain == grain,
+               sales.c.bucket >= start, sales.c.bucket < end)
+        .order_by(sales.c.bucket)
+    ).mappings().all()
+    by_bucket = {r["bucket"]: r for r in rows}
+    empty = dict.fromkeys(SALES_COUNTERS, 0)
+
+    # Dense series: buckets with no orders come back as zeros
+    buckets, bucket, step = [], start, GRAINS[grain]
+    while bucket < end:
+        buckets.append(dict(_totals(by_bucket.get(bucket, empty)), bucket=bucket))
+        bucket += step
+    totals = {c: sum(b[c] for b in buckets) for c in SALES_COUNTERS}
+    return {
+        "restaurant_id": restaurant_id,
+        "grain": grain,
+        "start": start,
+        "end": end,
+        "totals": _totals(totals),
+        "buckets": buckets,
+    }
+
+
+def top_items(db, restaurant_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              by: str = "revenue", limit: int = 10) -> dict:
+    # Whole days, from the daily buckets; "quantity" ranks by units ordered
+    if by not in ("revenue", "quantity"):
+        raise ValueError("by must be revenue or quantity")
+    start, end = _window(DAY, start, end)
+    sums = {c: func.sum(item_sales.c[c]).label(c) for c in ITEM_COUNTERS}
+    ranked = (
+        select(item_sales.c.menu_id, *sums.values())
+        .where(item_sales.c.restaurant_id == restaurant_id, item_sales.c.grain == DAY,
+               item_sales.c.bucket >= start, item_sales.c.bucket < end)
+        .group_by(item_sales.c.menu_id)
+        .order_by(sums[by].desc(), item_sales.c.menu_id)
+        .limit(limit)
+        .subquery()
+    )
+    menu = models.MenuItem.__table__
+    rows = db.execute(
+        select(ranked, menu.c.name, menu.c.category)
+        .join(menu, menu.c.id == ranked.c.menu_id)
+        .order_by(ranked.c[by].desc(), ranked.c.menu_id)
+    ).mappings().all()
+    items = []
+    for r in rows:
+        item = {"item_id": r["menu_id"], "name": r["name"], "category": r["category"]}
+        item.update((c, r[c] or 0) for c in ITEM_COUNTERS)
+        for c in ("gross", "revenue", "cancelled_amount"):
+            item[c] = float(item[c])
+        items.append(item)
+    return {"restaurant_id": restaurant_id, "start": start, "end": end, "items": items}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        raise SystemExit("usage: python -m app.rollups rebuild [restaurant_id ...]")
+    rebuild_all([int(a) for a in sys.argv[2:]])
@@ -1,6 +1,15 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app import schemas, deps, crud
+from app import schemas, deps, crud, events, outbox, rollups
+from app.cache import menu_cache, table_directory
+from app.compression import compressed_bodies
+from app.database import pool_stats
+from app.fastjson import FAST_JSON, response as fast_response
+from app.gateway import gateway
+from app.hashing import password_hasher
+from app.idempotency import idempotency_store
 
 router = APIRouter(tags=["admin"], prefix="/api/admin")
 
@@ -10,9 +19,73 @@ def list_orders(
     status: str = None,
     limit: int = 20,
     page: int = 1,
+    cursor: str = None,
+    with_total: bool = True,
     db: Session = Depends(deps.get_db)
 ):
-    return crud.list_orders(db, restaurant_id, status, limit, page)
+    # Pass `cursor` (from pagination.next_cursor) for keyset paging
+    try:
+        orders, pagination = crud.list_orders(
+            db, restaurant_id, status, limit, page, cursor, with_total, raw=FAST_JSON
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if FAST_JSON:
+        return fast_response({"orders": orders, "pagination": pagination})
+    return {"orders": orders, "pagination": pagination}
+
+@router.get("/restaurants/{restaurant_id}/sales", response_model=schemas.SalesOut)
+def sales(
+    restaurant_id: int,
+    grain: str = rollups.DAY,
+    start: datetime = None,
+    end: datetime = None,
+    db: Session = Depends(deps.get_db)
+):
+    # Read from rollups only; defaults to the last 24 hours or 7 days
+    try:
+        return rollups.sales_series(db, restaurant_id, grain, start, end)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@router.get("/restaurants/{restaurant_id}/sales/items", response_model=schemas.TopItemsOut)
+def top_items(
+    restaurant_id: int,
+    start: datetime = None,
+    end: datetime = None,
+    by: str = "revenue",
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(deps.get_db)
+):
+    try:
+        return rollups.top_items(db, restaurant_id, start, end, by, limit)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+STREAM_HEARTBEAT = 15
+
+@router.get("/restaurants/{restaurant_id}/orders/stream")
+async def stream_orders(
+    restaurant_id: int,
+    request: Request,
+    last_event_id: str = Header(None),
+):
+    # Server-Sent Events: order.created / order.status_changed, resumable via Last-Event-ID
+    channel = events.restaurant_channel(restaurant_id)
+
+    async def body():
+        async with events.broker.subscribe(channel, last_event_id) as sub:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    ev = await sub.next(timeout=STREAM_HEARTBEAT)
+                except events.SubscriptionOverflow:
+                    # Client fell too far behind; it reconnects with Last-Event-ID
+                    return
+                yield ev.to_sse() if ev else ": keep-alive\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.put("/orders/{order_id}/status", response_model=schemas.UpdateStatusOut)
 def update_status(
@@ -20,4 +93,35 @@ def update_status(
     in_: schemas.UpdateStatusIn,
     db: Session = Depends(deps.get_db)
 ):
-    return crud.change_order_status(db, order_id, in_.status)
\ No newline at end of file
+    out = crud.change_order_status(db, order_id, in_.status, in_.estimated_completion_time)
+    if not out:
+        raise HTTPException(404, "Order not found")
+    return out
+
+@router.get("/archive/orders/{order_id}", response_model=schemas.ArchivedOrderOut)
+def get_archived_order(order_id: int, db: Session = Depends(deps.get_db)):
+    # Full record of an order moved out of the hot tables by app.archive
+    out = crud.get_archived_order(db, order_id)
+    if not out:
+        raise HTTPException(404, "Archived order not found")
+    return out
+
+@router.get("/stats")
+def stats():
+    # In-process cache and pool statistics for this worker
+    return {
+        "menu_cache": menu_cache.stats(),
+        "table_directory": table_directory.stats(),
+        "password_hashing": password_hasher.stats(),
+        "principal_cache": deps.principal_cache.stats(),
+        "events": events.broker.stats(),
+        "idempotency": idempotency_store.stats(),
+        "payment_gateway": gateway.stats(),
+        "compressed_bodies": compressed_bodies.stats(),
+        "db_pool": pool_stats(),
+    }
+
+@router.get("/outbox")
+def outbox_stats(db: Session = Depends(deps.get_db)):
+    # Backlog is shared across workers, so it comes from the database
+    return outbox.stats(db)
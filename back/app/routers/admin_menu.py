@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
+import csv
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
-from .. import schemas, crud, deps, models
+from .. import schemas, crud, deps, menu_io, models
+from ..database import SessionLocal
 
 router = APIRouter(prefix="/api/admin/menu", tags=["admin_menu"])
 
@@ -48,4 +51,42 @@ def delete_item(
     if not item or item.restaurant_id != restaurant_id:
         raise HTTPException(404, "Not found")
     # Delete the menu item
-    crud.delete_menu_item(db, item_id)
\ No newline at end of file
+    crud.delete_menu_item(db, item)
+
+@router.post("/{restaurant_id}/import", response_model=schemas.MenuImportOut)
+def import_menu(
+    restaurant_id: int,
+    request: Request,
+    atomic: bool = False,
+    db: Session = Depends(deps.get_db)
+):
+    # Bulk upsert from a CSV or JSON-lines body: parsed in full, then written in one transaction
+    try:
+        fmt = menu_io.format_for(request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(415, str(e))
+    if not crud.get_restaurant(db, restaurant_id):
+        raise HTTPException(404, "Restaurant not found")
+    db.rollback()  # no transaction stays open while the body uploads
+    rows = menu_io.parse(menu_io.request_lines(request), fmt)
+    try:
+        return crud.import_menu_items(db, restaurant_id, rows, atomic)
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(400, str(e))
+
+@router.get("/{restaurant_id}/export")
+def export_menu(restaurant_id: int, format: str = menu_io.CSV):
+    # Streams every item (available or not) in the import format
+    if format not in menu_io.MEDIA_TYPES:
+        raise HTTPException(400, "format must be csv or jsonl")
+
+    def body():
+        db = SessionLocal()
+        try:
+            yield from menu_io.dump(crud.iter_menu_items(db, restaurant_id), format)
+        finally:
+            db.close()
+
+    return StreamingResponse(body(), media_type=menu_io.MEDIA_TYPES[format], headers={
+        "Content-Disposition": f'attachment; filename="menu-{restaurant_id}.{format}"'
+    })
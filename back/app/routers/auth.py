@@ -1,6 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy.orm import Session
-from datetime import datetime
 from .. import schemas, crud, deps
 from ..models import RoleEnum
 
@@ -36,15 +35,7 @@ def login(
     return {"user_id": user.id, "token": token}
 
 @router.post("/guest", response_model=schemas.GuestOut)
-def guest(db: Session = Depends(deps.get_db)):
-    # Create a guest user
-    user = crud.create_user(
-        db,
-        name="Guest",
-        email=f"guest_{datetime.utcnow().timestamp()}@qrcode",
-        password="",
-        phone=None,
-        role=RoleEnum.client
-    )
-    token = crud.create_jwt(user.id)
-    return {"guest_id": user.id, "token": token}
\ No newline at end of file
+def guest():
+    # Issue a signed guest token; guests are not stored in accounts
+    guest_id, token = crud.create_guest_token()
+    return {"guest_id": guest_id, "token": token}
\ No newline at end of file
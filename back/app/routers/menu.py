@@ -1,25 +1,41 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 from app import schemas, deps, crud
+from app.etag import etag_matches, etagged_json, not_modified, set_etag
+from app.fastjson import FAST_JSON
 
 router = APIRouter(tags=["menu"], prefix="/api/restaurants")
 
 @router.get("/{restaurant_id}/menu", response_model=schemas.MenuOut)
 def get_menu(
     restaurant_id: int,
+    request: Request,
+    response: Response,
     category: str = None,
     search: str = None,
     db: Session = Depends(deps.get_db)
 ):
-    # Fetch menu categories and items
-    cats = crud.get_categories(db, restaurant_id, category, search)
-    return {"categories": cats}
+    # Fetch menu categories and items (served from the menu cache when warm)
+    if FAST_JSON:
+        return etagged_json(request, *crud.get_menu_json(db, restaurant_id, category, search))
+    menu, etag = crud.get_menu(db, restaurant_id, category, search)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return menu
 
 @router.get("/{restaurant_id}/featured", response_model=schemas.FeaturedOut)
 def get_featured(
     restaurant_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db)
 ):
     # Fetch featured menu items
-    items = crud.get_featured(db, restaurant_id)
-    return {"featured_items": items}
\ No newline at end of file
+    if FAST_JSON:
+        return etagged_json(request, *crud.get_featured_json(db, restaurant_id))
+    featured, etag = crud.get_featured_with_etag(db, restaurant_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return featured
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import schemas, deps, crud_async
+from app.etag import etag_matches, etagged_json, not_modified, set_etag
+from app.fastjson import FAST_JSON
+
+# Async variants of routers/menu.py, mounted ahead of it when DB_ASYNC=1
+router = APIRouter(tags=["menu"], prefix="/api/restaurants")
+
+@router.get("/{restaurant_id}/menu", response_model=schemas.MenuOut)
+async def get_menu_async(
+    restaurant_id: int,
+    request: Request,
+    response: Response,
+    category: str = None,
+    search: str = None,
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    if FAST_JSON:
+        return etagged_json(request, *await crud_async.get_menu_json(db, restaurant_id, category, search))
+    menu, etag = await crud_async.get_menu(db, restaurant_id, category, search)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return menu
+
+@router.get("/{restaurant_id}/featured", response_model=schemas.FeaturedOut)
+async def get_featured_async(
+    restaurant_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    if FAST_JSON:
+        return etagged_json(request, *await crud_async.get_featured_json(db, restaurant_id))
+    featured, etag = await crud_async.get_featured_with_etag(db, restaurant_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return featured
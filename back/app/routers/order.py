@@ -1,20 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
 from sqlalchemy.orm import Session
-from .. import schemas, crud, deps
+from starlette.concurrency import run_in_threadpool
+from .. import schemas, crud, deps, events
+from ..idempotency import idempotency_store
 
 router = APIRouter(prefix="/api/orders", tags=["order"])
 
 @router.post("", response_model=schemas.CreateOrderOut)
 def create_order(
     in_: schemas.CreateOrderIn,
+    idempotency_key: Optional[str] = Header(None),
     db: Session = Depends(deps.get_db)
 ):
-    try:
-        # Attempt to create an order
-        return crud.create_order(db, in_)
-    except ValueError as e:
-        # Handle validation errors
-        raise HTTPException(400, str(e))
+    def handler():
+        try:
+            # Attempt to create an order
+            return crud.create_order(db, in_)
+        except ValueError as e:
+            # Handle validation errors
+            raise HTTPException(400, str(e))
+    # Retries carrying the same Idempotency-Key replay the first response
+    return idempotency_store.run("orders", idempotency_key, in_, handler)
 
 @router.get("/{order_id}", response_model=schemas.OrderStatusOut)
 def get_order(order_id: int, db: Session = Depends(deps.get_db)):
@@ -25,6 +32,27 @@ def get_order(order_id: int, db: Session = Depends(deps.get_db)):
         raise HTTPException(404, "Order not found")
     return ord
 
+@router.get("/{order_id}/wait", response_model=schemas.OrderStatusOut)
+async def wait_for_status(
+    order_id: int,
+    status: schemas.OrderStatusEnum = None,
+    timeout: float = 30
+):
+    # Long-poll: return as soon as the status differs from `status`, 304 if it never does
+    timeout = min(max(timeout, 0), 60)
+    async with events.broker.subscribe(events.order_channel(order_id)) as sub:
+        current = await run_in_threadpool(deps.run_with_db, crud.get_order_status, order_id)
+        if current is None:
+            raise HTTPException(404, "Order not found")
+        if current == status:
+            ev = await sub.next(timeout=timeout)
+            if ev is None:
+                # Re-check once in case the change landed before the subscription was live
+                current = await run_in_threadpool(deps.run_with_db, crud.get_order_status, order_id)
+                if current == status:
+                    return Response(status_code=304)
+    return await run_in_threadpool(deps.run_with_db, crud.get_order, order_id)
+
 @router.put("/{order_id}", response_model=schemas.UpdateOrderOut)
 def update_order(
     order_id: int,
@@ -0,0 +1,54 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import schemas, crud_async, deps, events
+from ..database import AsyncSessionLocal
+from ..idempotency import idempotency_store
+
+# Async variants of routers/order.py, mounted ahead of it when DB_ASYNC=1
+router = APIRouter(prefix="/api/orders", tags=["order"])
+
+@router.post("", response_model=schemas.CreateOrderOut)
+async def create_order_async(
+    in_: schemas.CreateOrderIn,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    async def handler():
+        try:
+            return await crud_async.create_order(db, in_)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+    # Shares the "orders" scope with the sync route
+    return await idempotency_store.arun("orders", idempotency_key, in_, handler)
+
+@router.get("/{order_id}", response_model=schemas.OrderStatusOut)
+async def get_order_async(order_id: int, db: AsyncSession = Depends(deps.get_async_db)):
+    ord = await crud_async.get_order(db, order_id)
+    if not ord:
+        raise HTTPException(404, "Order not found")
+    return ord
+
+@router.get("/{order_id}/wait", response_model=schemas.OrderStatusOut)
+async def wait_for_status_async(
+    order_id: int,
+    status: schemas.OrderStatusEnum = None,
+    timeout: float = 30
+):
+    # Same contract as the sync route; sessions are opened per read so the
+    # connection goes back to the pool while we wait
+    timeout = min(max(timeout, 0), 60)
+    async with events.broker.subscribe(events.order_channel(order_id)) as sub:
+        async with AsyncSessionLocal() as db:
+            current = await crud_async.get_order_status(db, order_id)
+        if current is None:
+            raise HTTPException(404, "Order not found")
+        if current == status:
+            ev = await sub.next(timeout=timeout)
+            if ev is None:
+                async with AsyncSessionLocal() as db:
+                    current = await crud_async.get_order_status(db, order_id)
+                if current == status:
+                    return Response(status_code=304)
+    async with AsyncSessionLocal() as db:
+        return await crud_async.get_order(db, order_id)
@@ -1,30 +1,81 @@
-from fastapi import APIRouter, HTTPException, Depends
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from .. import schemas, crud, deps
+from ..gateway import (FAILED, PAYMENT_WEBHOOK_SECRET, SUCCEEDED, GatewayError, gateway,
+                       payment_status, verify_signature)
+from ..idempotency import idempotency_store
 
 router = APIRouter(prefix="/api/payments", tags=["payment"])
 
+# Provider calls are awaited on the event loop; database work runs in the
+# threadpool with a short-lived session, so no thread waits on the network.
+
 @router.post("", response_model=schemas.CreatePaymentOut)
-def create_payment(
+async def create_payment(
     in_: schemas.CreatePaymentIn,
-    db: Session = Depends(deps.get_db)
+    idempotency_key: Optional[str] = Header(None)
 ):
-    # Create a payment intent
-    try:
-        return crud.create_payment(db, in_)
-    except Exception as e:
-        raise HTTPException(400, str(e))
+    async def handler():
+        try:
+            payment = await run_in_threadpool(deps.run_with_db, crud.create_payment, in_)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        try:
+            intent = await gateway.create_intent(
+                payment.amount, payment.currency,
+                idempotency_key=f"payment-{payment.id}",
+                metadata={"order_id": payment.order_id, "payment_id": payment.id},
+            )
+        except GatewayError:
+            await run_in_threadpool(deps.run_with_db, crud.fail_payment, payment.id)
+            raise HTTPException(502, "Payment provider unavailable")
+        await run_in_threadpool(deps.run_with_db, crud.attach_payment_intent, payment.id, intent["id"])
+        return schemas.CreatePaymentOut(client_secret=intent["client_secret"], payment_intent_id=intent["id"])
+    return await idempotency_store.arun("payments", idempotency_key, in_, handler)
 
 @router.post("/confirm", response_model=schemas.ConfirmPaymentOut)
-def confirm_payment(
-    in_: schemas.ConfirmPaymentIn,
-    db: Session = Depends(deps.get_db)
-):
-    # Confirm the payment intent
+async def confirm_payment(in_: schemas.ConfirmPaymentIn):
+    # The client says it paid; ask the provider rather than trusting it
     try:
-        return crud.confirm_payment(db, in_.payment_intent_id)
-    except Exception as e:
-        raise HTTPException(400, str(e))
+        intent = await gateway.retrieve_intent(in_.payment_intent_id)
+    except GatewayError as e:
+        if e.status_code == 404:
+            raise HTTPException(404, "Payment not found")
+        raise HTTPException(502, "Payment provider unavailable")
+    status = await run_in_threadpool(
+        deps.run_with_db, crud.confirm_payment, intent["id"], payment_status(intent.get("status"))
+    )
+    if status is None:
+        raise HTTPException(404, "Payment not found")
+    if status == FAILED:
+        raise HTTPException(402, "Payment failed")
+    return schemas.ConfirmPaymentOut(
+        success=status == SUCCEEDED,
+        receipt_url=intent.get("receipt_url"),
+        transaction_id=intent.get("latest_charge") or intent["id"]
+    )
+
+@router.post("/webhook")
+async def payment_webhook(request: Request, gateway_signature: Optional[str] = Header(None)):
+    # Provider -> us: the authoritative outcome, matched to the Payment by intent_id
+    if not PAYMENT_WEBHOOK_SECRET:
+        # Never accept unsigned events; main logs a warning at startup
+        raise HTTPException(503, "Payment webhook is not configured")
+    body = await request.body()
+    if not verify_signature(body, gateway_signature):
+        raise HTTPException(401, "Invalid signature")
+    try:
+        intent = json.loads(body)["data"]
+        intent_id = intent["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(400, "Malformed event")
+    status = payment_status(intent.get("status"))
+    await run_in_threadpool(deps.run_with_db, crud.confirm_payment, intent_id, status)
+    # Unknown intents are acknowledged too, or the provider keeps redelivering
+    return {"received": True}
 
 @router.post("/split", response_model=schemas.SplitBillOut)
 def split_bill(
@@ -34,5 +85,5 @@ def split_bill(
     # Split the bill
     try:
         return crud.split_bill(db, in_)
-    except Exception as e:
-        raise HTTPException(400, str(e))
\ No newline at end of file
+    except ValueError as e:
+        raise HTTPException(400, str(e))
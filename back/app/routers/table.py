@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from sqlalchemy.orm import Session
 from .. import schemas, crud, deps
+from ..etag import compute_etag, etag_matches, not_modified, set_etag
 
 router = APIRouter(prefix="/api/table", tags=["table"])
 
@@ -8,30 +9,22 @@ router = APIRouter(prefix="/api/table", tags=["table"])
 def get_table_info(
     restaurant_id: int,
     table_number: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db)
 ):
-    # Fetch the restaurant
-    rest = crud.get_restaurant(db, restaurant_id)
-    if not rest:
+    # One DB hit: restaurant and table come from the table directory
+    info = crud.get_table_info(db, restaurant_id, table_number)
+    if info is None:
         raise HTTPException(404, "Restaurant not found")
-
-    # Fetch the table
-    tbl = crud.get_table(db, restaurant_id, table_number)
-    if not tbl:
+    if info["table_id"] is None:
         raise HTTPException(404, "Table not found")
-
-    # Fetch the active session
-    sess = crud.get_active_session(db, tbl.id)
-
-    # Return table information
-    return schemas.TableInfoOut(
-        restaurant_id=rest.id,
-        restaurant_name=rest.name,
-        table_id=tbl.id,
-        table_number=tbl.number,
-        table_location=tbl.location,
-        current_session_id=(sess.id if sess else None)
-    )
+    out = schemas.TableInfoOut(**info)
+    etag = compute_etag(out)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return out
 
 @router.post("/session", response_model=schemas.StartSessionOut)
 def start_session(
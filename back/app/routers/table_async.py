@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import schemas, crud_async, deps
+from ..etag import compute_etag, etag_matches, not_modified, set_etag
+
+# Async variants of routers/table.py, mounted ahead of it when DB_ASYNC=1
+router = APIRouter(prefix="/api/table", tags=["table"])
+
+@router.get("/{restaurant_id}/{table_number}", response_model=schemas.TableInfoOut)
+async def get_table_info_async(
+    restaurant_id: int,
+    table_number: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    info = await crud_async.get_table_info(db, restaurant_id, table_number)
+    if info is None:
+        raise HTTPException(404, "Restaurant not found")
+    if info["table_id"] is None:
+        raise HTTPException(404, "Table not found")
+    out = schemas.TableInfoOut(**info)
+    etag = compute_etag(out)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return out
+
+@router.post("/session", response_model=schemas.StartSessionOut)
+async def start_session_async(
+    in_: schemas.StartSessionIn,
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    sess = await crud_async.create_session(db, in_.restaurant_id, in_.table_id, in_.user_id)
+    return schemas.StartSessionOut(
+        session_id=sess.id,
+        start_time=sess.start_time
+    )
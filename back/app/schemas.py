@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, confloat
 from typing import Optional, List
 from datetime import datetime
 from .models import OrderStatusEnum
@@ -33,7 +33,7 @@ class TableInfoOut(BaseModel):
 class StartSessionIn(BaseModel):
     restaurant_id: int
     table_id: int
-    user_id: int
+    user_id: Optional[int]  # null for guests
 
 class StartSessionOut(BaseModel):
     session_id: int
@@ -67,6 +67,25 @@ class MenuItemOut(BaseModel):
     class Config:
         orm_mode = True
 
+class MenuImportRow(BaseModel):
+    id:          Optional[int]  # update this item; otherwise matched by name
+    name:        str
+    description: Optional[str]
+    price:       confloat(ge=0, lt=100000)
+    category:    str
+    available:   bool = True
+
+class MenuImportError(BaseModel):
+    line:  int
+    error: str
+
+class MenuImportOut(BaseModel):
+    inserted:  int
+    updated:   int
+    failed:    int
+    committed: bool
+    errors:    List[MenuImportError]  # first MENU_IMPORT_MAX_ERRORS only
+
 class CategoryOut(BaseModel):
     name: str
     items: List[MenuItemOut]
@@ -87,7 +106,7 @@ class CreateOrderIn(BaseModel):
     restaurant_id: int
     table_id: int
     session_id: int
-    user_id: int
+    user_id: Optional[int]  # null for guests
     items: List[OrderItemIn]
 
 class CreateOrderOut(BaseModel):
@@ -102,7 +121,7 @@ class CreateOrderOut(BaseModel):
 class OrderStatusOut(BaseModel):
     order_id: int
     status: OrderStatusEnum
-    estimated_completion_time: datetime
+    estimated_completion_time: Optional[int]  # minutes
     items: List[OrderItemIn]
 
 class UpdateOrderIn(BaseModel):
@@ -131,7 +150,7 @@ class ConfirmPaymentIn(BaseModel):
 
 class ConfirmPaymentOut(BaseModel):
     success: bool
-    receipt_url: str
+    receipt_url: Optional[str]
     transaction_id: str
 
 class SplitBillIn(BaseModel):
@@ -154,9 +173,10 @@ class ActiveOrderOut(BaseModel):
     created_at: datetime
 
 class Pagination(BaseModel):
-    total: int
-    current_page: int
-    total_pages: int
+    total: Optional[int]
+    current_page: Optional[int]
+    total_pages: Optional[int]
+    next_cursor: Optional[str]
 
 class GetActiveOrdersOut(BaseModel):
     orders: List[ActiveOrderOut]
@@ -170,4 +190,72 @@ class UpdateStatusOut(BaseModel):
     success: bool
     order_id: int
     status: OrderStatusEnum
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+class ArchivedOrderItemOut(BaseModel):
+    item_id: int
+    quantity: int
+    unit_price: float
+    special_instructions: Optional[str]
+
+class ArchivedPaymentOut(BaseModel):
+    payment_method: str
+    amount: float
+    currency: Optional[str]
+    status: Optional[str]
+    created_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+class ArchivedOrderOut(BaseModel):
+    order_id: int
+    order_number: str
+    restaurant_id: int
+    table_id: int
+    session_id: int
+    status: OrderStatusEnum
+    total: float
+    created_at: Optional[datetime]
+    paid_at: Optional[datetime]
+    archived_at: datetime
+    items: List[ArchivedOrderItemOut]
+    payments: List[ArchivedPaymentOut]
+
+# --- Sales dashboards (rollups) ---
+class SalesTotalsOut(BaseModel):
+    orders: int
+    gross: float             # total of orders placed
+    paid_orders: int
+    revenue: float           # total of orders paid
+    cancelled_orders: int
+    cancelled_amount: float
+    average_ticket: Optional[float]  # revenue / paid_orders
+
+class SalesBucketOut(SalesTotalsOut):
+    bucket: datetime  # UTC start of the hour/day
+
+class SalesOut(BaseModel):
+    restaurant_id: int
+    grain: str
+    start: datetime
+    end: datetime
+    totals: SalesTotalsOut
+    buckets: List[SalesBucketOut]
+
+class ItemSalesOut(BaseModel):
+    item_id: int
+    name: str
+    category: str
+    quantity: int
+    gross: float  # before tax
+    paid_quantity: int
+    revenue: float
+    cancelled_quantity: int
+    cancelled_amount: float
+
+class TopItemsOut(BaseModel):
+    restaurant_id: int
+    start: datetime
+    end: datetime
+    items: List[ItemSalesOut]
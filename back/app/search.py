@@ -0,0 +1,193 @@
+import difflib
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+
+from . import models
+
+SEARCH_LIMIT = int(os.getenv("MENU_SEARCH_LIMIT", 50))
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# install() builds the search schema on databases made without migrations.
+# The migrations are the source of truth: these must produce what
+# `alembic upgrade head` does (tests/test_search_schema.py checks it).
+# SQLite: external-content FTS5 table over menu, kept in sync by triggers
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS menu_fts USING fts5("
+    "name, description, category, content='menu', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS menu_fts_vocab USING fts5vocab(menu_fts, 'row')",
+    "CREATE TRIGGER IF NOT EXISTS menu_fts_ai AFTER INSERT ON menu BEGIN "
+    "INSERT INTO menu_fts(rowid, name, description, category) "
+    "VALUES (new.id, new.name, new.description, new.category); END",
+    "CREATE TRIGGER IF NOT EXISTS menu_fts_ad AFTER DELETE ON menu BEGIN "
+    "INSERT INTO menu_fts(menu_fts, rowid, name, description, category) "
+    "VALUES ('delete', old.id, old.name, old.description, old.category); END",
+    "CREATE TRIGGER IF NOT EXISTS menu_fts_au AFTER UPDATE ON menu BEGIN "
+    "INSERT INTO menu_fts(menu_fts, rowid, name, description, category) "
+    "VALUES ('delete', old.id, old.name, old.description, old.category); "
+    "INSERT INTO menu_fts(rowid, name, description, category) "
+    "VALUES (new.id, new.name, new.description, new.category); END",
+]
+SQLITE_REBUILD = "INSERT INTO menu_fts(menu_fts) VALUES ('rebuild')"
+# Postgres: weighted tsvector as a generated column, plus trigrams for typos
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE menu ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_menu_search_vector ON menu USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_menu_name_trgm ON menu USING gin (name gin_trgm_ops)",
+]
+# Objects owned by this module rather than by the ORM models
+MANAGED_TABLES = {"menu_fts", "menu_fts_vocab"}
+MANAGED_COLUMNS = {("menu", "search_vector")}
+
+
+def tokenize(query: str) -> List[str]:
+    return [t.lower() for t in _TOKEN.findall(query)]
+
+
+class MenuSearchIndex(ABC):
+    """Ranked menu search for one restaurant; returns menu ids best match first."""
+
+    name: str
+
+    @abstractmethod
+    def search(self, db: Session, restaurant_id: int, query: str,
+               category: Optional[str] = None, limit: int = SEARCH_LIMIT) -> List[int]:
+        ...
+
+
+class LikeIndex(MenuSearchIndex):
+    # Fallback for engines without full-text support; scans the restaurant's menu
+    name = "like"
+
+    def search(self, db, restaurant_id, query, category=None, limit=SEARCH_LIMIT):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        q = db.query(models.MenuItem.id, models.MenuItem.name).filter(
+            models.MenuItem.restaurant_id == restaurant_id,
+            models.MenuItem.available == True,
+        )
+        for tok in tokens:
+            pattern = f"%{tok}%"
+            q = q.filter(or_(models.MenuItem.name.ilike(pattern),
+                             models.MenuItem.description.ilike(pattern),
+                             models.MenuItem.category.ilike(pattern)))
+        if category:
+            q = q.filter(models.MenuItem.category == category)
+        rows = q.limit(limit).all()
+        # Name hits first
+        rows.sort(key=lambda r: not all(t in r.name.lower() for t in tokens))
+        return [r.id for r in rows]
+
+
+class SqliteFtsIndex(MenuSearchIndex):
+    name = "sqlite-fts5"
+
+    SQL = (
+        "SELECT m.id FROM menu_fts JOIN menu m ON m.id = menu_fts.rowid "
+        "WHERE menu_fts MATCH :match AND m.restaurant_id = :rid AND m.available = 1 {category} "
+        "ORDER BY bm25(menu_fts, 10.0, 1.0, 4.0) LIMIT :limit"
+    )
+
+    def _run(self, db, restaurant_id, match, category, limit):
+        sql = self.SQL.format(category="AND m.category = :category" if category else "")
+        params = {"match": match, "rid": restaurant_id, "limit": limit, "category": category}
+        return [r[0] for r in db.execute(text(sql), params)]
+
+    def _correct(self, db, token: str) -> List[str]:
+        # Typo tolerance: nearest indexed terms sharing the first letter
+        terms = [r[0] for r in db.execute(
+            text("SELECT term FROM menu_fts_vocab WHERE term >= :lo AND term < :hi"),
+            {"lo": token[0], "hi": chr(ord(token[0]) + 1)},
+        )]
+        return difflib.get_close_matches(token, terms, n=3, cutoff=0.75)
+
+    def search(self, db, restaurant_id, query, category=None, limit=SEARCH_LIMIT):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Every token is a quoted prefix query, so user input never reaches FTS syntax
+        ids = self._run(db, restaurant_id, " ".join(f'"{t}"*' for t in tokens), category, limit)
+        if ids:
+            return ids
+        groups = []
+        for tok in tokens:
+            alternatives = [tok] + self._correct(db, tok)
+            groups.append("(" + " OR ".join(f'"{a}"*' for a in alternatives) + ")")
+        return self._run(db, restaurant_id, " AND ".join(groups), category, limit)
+
+
+class PostgresIndex(MenuSearchIndex):
+    name = "postgres-tsvector"
+
+    SQL = (
+        "SELECT id FROM menu "
+        "WHERE restaurant_id = :rid AND available {category} AND "
+        "(search_vector @@ to_tsquery('simple', :tsq) OR name % :raw) "
+        "ORDER BY ts_rank(search_vector, to_tsquery('simple', :tsq)) + similarity(name, :raw) DESC "
+        "LIMIT :limit"
+    )
+
+    def search(self, db, restaurant_id, query, category=None, limit=SEARCH_LIMIT):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        sql = self.SQL.format(category="AND category = :category" if category else "")
+        params = {
+            "rid": restaurant_id,
+            "tsq": " & ".join(f"{t}:*" for t in tokens),
+            "raw": " ".join(tokens),
+            "limit": limit,
+            "category": category,
+        }
+        return [r[0] for r in db.execute(text(sql), params)]
+
+
+def rebuild(connection):
+    # Re-index every menu row (needed after bulk loads that bypass triggers)
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(SQLITE_REBUILD))
+
+
+def install(connection):
+    # Create the search objects on a database built without migrations
+    if connection.dialect.name == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'menu_fts'")
+        ).first()
+        for stmt in SQLITE_DDL:
+            connection.execute(text(stmt))
+        if not exists:
+            rebuild(connection)
+    elif connection.dialect.name == "postgresql":
+        for stmt in POSTGRES_DDL:
+            connection.execute(text(stmt))
+
+
+_index_by_dialect = {}
+
+
+def get_index(db: Session) -> MenuSearchIndex:
+    bind = db.get_bind()
+    dialect = bind.dialect.name
+    index = _index_by_dialect.get(dialect)
+    if index is None:
+        if dialect == "postgresql":
+            index = PostgresIndex()
+        elif dialect == "sqlite" and db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'menu_fts'")
+        ).first():
+            index = SqliteFtsIndex()
+        else:
+            index = LikeIndex()
+        _index_by_dialect[dialect] = index
+    return index
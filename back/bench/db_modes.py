@@ -0,0 +1,94 @@
+"""
+Sync vs async database path throughput.
+
+Starts the API under uvicorn once per mode (DB_ASYNC=0 / DB_ASYNC=1) against
+the same database and drives DB-bound guest endpoints at fixed concurrency.
+
+    python -m bench.db_modes --database-url sqlite:///./bench.db
+    python -m bench.db_modes --database-url postgresql://user:pw@localhost/bench
+
+Prints one JSON object per mode with requests/sec and error counts.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench.seed import seed
+
+ENDPOINTS = [
+    "/api/table/{rid}/{table}",
+    "/api/restaurants/{rid}/menu?search=dish",
+    "/api/orders/{order_id}",
+]
+
+
+async def drive(base: str, ids: dict, concurrency: int, duration: float) -> dict:
+    done = errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: httpx.AsyncClient, n: int):
+        nonlocal done, errors
+        while time.perf_counter() < deadline:
+            path = ENDPOINTS[n % len(ENDPOINTS)].format(**ids)
+            n += 1
+            r = await client.get(base + path)
+            if r.status_code == 200:
+                done += 1
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"requests": done, "errors": errors, "rps": round(done / elapsed, 1)}
+
+
+def wait_ready(base: str, timeout: float = 20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(base + "/openapi.json", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--database-url", default="sqlite:///./bench.db")
+    p.add_argument("--concurrency", type=int, default=64)
+    p.add_argument("--duration", type=float, default=10)
+    p.add_argument("--port", type=int, default=8900)
+    args = p.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    ids = seed(args.database_url, restaurants=1, tables=20, menu_items=80, orders=500)
+    base = f"http://127.0.0.1:{args.port}"
+
+    for mode in ("0", "1"):
+        env = dict(os.environ, DATABASE_URL=args.database_url, DB_ASYNC=mode)
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            wait_ready(base)
+            result = asyncio.run(drive(base, ids, args.concurrency, args.duration))
+        finally:
+            proc.terminate()
+            proc.wait()
+        result.update(mode="async" if mode == "1" else "sync", concurrency=args.concurrency)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Local stand-in for the payment provider, for tests and benchmarks.
+
+Speaks the subset of the API app.gateway uses (create/retrieve intents,
+Idempotency-Key on create) and adds /confirm, which plays the customer
+paying. After a confirm it POSTs a signed webhook to --webhook-url, as the
+real provider would. Latency and transient 503s can be injected to
+exercise the client's timeouts and retries.
+
+    PAYMENT_WEBHOOK_SECRET=dev-secret python -m bench.fake_gateway --port 8900 \\
+        --webhook-url http://127.0.0.1:8000/api/payments/webhook --latency 0.05
+
+then run the API with PAYMENT_GATEWAY_URL=http://127.0.0.1:8900 and the
+same PAYMENT_WEBHOOK_SECRET.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import time
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app.gateway import SIGNATURE_HEADER, sign
+
+LATENCY = float(os.getenv("FAKE_GATEWAY_LATENCY", 0))
+ERROR_RATE = float(os.getenv("FAKE_GATEWAY_ERROR_RATE", 0))
+WEBHOOK_URL = os.getenv("FAKE_GATEWAY_WEBHOOK_URL", "")
+WEBHOOK_SECRET = os.getenv("PAYMENT_WEBHOOK_SECRET", "")
+
+app = FastAPI(title="fake payment gateway")
+intents = {}
+by_key = {}
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        return JSONResponse({"error": "injected failure"}, status_code=503)
+    return await call_next(request)
+
+
+@app.post("/v1/payment_intents")
+async def create_intent(request: Request, idempotency_key: str = Header(None)):
+    body = await request.json()
+    if idempotency_key in by_key:
+        return intents[by_key[idempotency_key]]
+    if not isinstance(body.get("amount"), int) or body["amount"] <= 0:
+        raise HTTPException(400, "amount must be a positive integer in minor units")
+    intent_id = "pi_" + secrets.token_hex(12)
+    intents[intent_id] = {
+        "id": intent_id,
+        "client_secret": f"{intent_id}_secret_{secrets.token_hex(8)}",
+        "status": "requires_confirmation",
+        "amount": body["amount"],
+        "currency": body.get("currency", "usd"),
+        "metadata": body.get("metadata") or {},
+        "created": int(time.time()),
+    }
+    if idempotency_key:
+        by_key[idempotency_key] = intent_id
+    return intents[intent_id]
+
+
+@app.get("/v1/payment_intents/{intent_id}")
+def retrieve_intent(intent_id: str):
+    if intent_id not in intents:
+        raise HTTPException(404, "No such payment_intent")
+    return intents[intent_id]
+
+
+async def send_webhook(intent: dict):
+    body = json.dumps({
+        "id": "evt_" + secrets.token_hex(12),
+        "type": "payment_intent." + ("succeeded" if intent["status"] == "succeeded" else "payment_failed"),
+        "data": intent,
+    }).encode()
+    async with httpx.AsyncClient(timeout=10) as client:
+        await client.post(WEBHOOK_URL, content=body, headers={
+            "Content-Type": "application/json", SIGNATURE_HEADER: sign(body, WEBHOOK_SECRET),
+        })
+
+
+@app.post("/v1/payment_intents/{intent_id}/confirm")
+async def confirm_intent(intent_id: str, decline: bool = False):
+    # Test hook: the customer completes (or fails) payment
+    intent = retrieve_intent(intent_id)
+    if intent["status"] == "requires_confirmation":
+        if decline:
+            intent["status"] = "failed"
+        else:
+            intent.update(status="succeeded", latest_charge="ch_" + secrets.token_hex(12),
+                          receipt_url=f"https://receipts.example/{intent_id}")
+        if WEBHOOK_URL:
+            asyncio.get_running_loop().create_task(send_webhook(dict(intent)))
+    return intent
+
+
+def main():
+    global LATENCY, ERROR_RATE, WEBHOOK_URL, WEBHOOK_SECRET
+    import uvicorn
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--port", type=int, default=8900)
+    p.add_argument("--webhook-url", default=WEBHOOK_URL)
+    p.add_argument("--latency", type=float, default=LATENCY)
+    p.add_argument("--error-rate", type=float, default=ERROR_RATE)
+    p.add_argument("--webhook-secret", default=WEBHOOK_SECRET)
+    args = p.parse_args()
+    if args.webhook_url and not args.webhook_secret:
+        p.error("--webhook-url needs --webhook-secret (or PAYMENT_WEBHOOK_SECRET)")
+    LATENCY, ERROR_RATE, WEBHOOK_URL = args.latency, args.error_rate, args.webhook_url
+    WEBHOOK_SECRET = args.webhook_secret
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
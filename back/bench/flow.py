@@ -0,0 +1,211 @@
+"""
+End-to-end load test of the diner and admin flows.
+
+Seeds a synthetic dataset (bench.seed), starts the API under uvicorn and
+runs two kinds of virtual users until --duration elapses:
+
+  diner: guest login -> table info -> start session -> menu -> create order
+         -> poll order status (--polls times)
+  admin: list orders (keyset paging) -> change the status of a listed order
+
+    python -m bench.flow --database-url sqlite:///./bench.db --diners 32 --admins 4
+    python -m bench.flow --database-url postgresql://user:pw@localhost/bench --orders 200000
+    python -m bench.flow --base-url http://127.0.0.1:8000 --no-seed   # existing server
+
+Writes one JSON document (stdout or --output) with p50/p95/p99 latency,
+throughput and error counts per endpoint, so runs can be diffed in CI.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from bench.db_modes import wait_ready
+from bench.seed import seed
+
+STATUS_FLOW = {"pending": "preparing", "preparing": "served", "served": "paid"}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank
+    k = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[min(k, len(sorted_values) - 1)]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.flows: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kw):
+        start = time.perf_counter()
+        try:
+            r = await client.request(method, url, **kw)
+        except httpx.HTTPError:
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - start)
+        if r.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return r
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[label])
+            endpoints[label] = {
+                "count": len(values),
+                "errors": self.errors[label],
+                "rps": round(len(values) / elapsed, 1),
+                "p50_ms": round(1000 * percentile(values, 50), 2),
+                "p95_ms": round(1000 * percentile(values, 95), 2),
+                "p99_ms": round(1000 * percentile(values, 99), 2),
+                "max_ms": round(1000 * values[-1], 2) if values else 0.0,
+            }
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "flows": {k: {"completed": v, "per_s": round(v / elapsed, 2)} for k, v in self.flows.items()},
+            "endpoints": endpoints,
+        }
+
+
+async def diner(client: httpx.AsyncClient, rec: Recorder, ids: dict, args, rng: random.Random, deadline: float):
+    while time.perf_counter() < deadline:
+        rid = rng.randint(1, ids["restaurants"])
+        table = rng.randint(1, ids["tables"])
+        if not await rec.call(client, "POST /api/auth/guest", "POST", "/api/auth/guest"):
+            continue
+        if not await rec.call(client, "GET /api/table/{rid}/{table}", "GET", f"/api/table/{rid}/{table}"):
+            continue
+        # TableInfoOut has no table id; seed.py numbers tables per restaurant
+        table_id = (rid - 1) * ids["tables"] + table
+        sess = await rec.call(client, "POST /api/table/session", "POST", "/api/table/session",
+                              json={"restaurant_id": rid, "table_id": table_id})
+        if not sess:
+            continue
+        await rec.call(client, "GET /api/restaurants/{rid}/menu", "GET", f"/api/restaurants/{rid}/menu")
+        first_item = (rid - 1) * ids["menu_items"] + 1
+        items = [{"item_id": first_item + rng.randrange(ids["menu_items"]), "quantity": rng.randint(1, 3)}
+                 for _ in range(rng.randint(1, 4))]
+        order = await rec.call(
+            client, "POST /api/orders", "POST", "/api/orders",
+            json={"restaurant_id": rid, "table_id": table_id,
+                  "session_id": sess.json()["session_id"], "items": items},
+            headers={"Idempotency-Key": uuid.uuid4().hex},
+        )
+        if not order:
+            continue
+        oid = order.json()["order_id"]
+        for _ in range(args.polls):
+            await rec.call(client, "GET /api/orders/{order_id}", "GET", f"/api/orders/{oid}")
+            await asyncio.sleep(args.poll_interval)
+        rec.flows["diner"] += 1
+
+
+async def admin(client: httpx.AsyncClient, rec: Recorder, ids: dict, args, rng: random.Random, deadline: float):
+    cursors: Dict[int, str] = {}
+    while time.perf_counter() < deadline:
+        rid = rng.randint(1, ids["restaurants"])
+        params = {"limit": 20, "with_total": "false"}
+        if cursors.get(rid):
+            params["cursor"] = cursors[rid]
+        listing = await rec.call(client, "GET /api/admin/restaurants/{rid}/orders", "GET",
+                                 f"/api/admin/restaurants/{rid}/orders", params=params)
+        if not listing:
+            continue
+        body = listing.json()
+        # Page a few screens deep, then start over from the newest orders
+        cursors[rid] = body["pagination"]["next_cursor"] if rng.random() < 0.7 else None
+        movable = [o for o in body["orders"] if o["status"] in STATUS_FLOW]
+        if movable:
+            o = rng.choice(movable)
+            await rec.call(client, "PUT /api/admin/orders/{order_id}/status", "PUT",
+                           f"/api/admin/orders/{o['order_id']}/status",
+                           json={"status": STATUS_FLOW[o["status"]]})
+        rec.flows["admin"] += 1
+        await asyncio.sleep(args.admin_think)
+
+
+async def run(base: str, ids: dict, args) -> dict:
+    rec = Recorder()
+    rng = random.Random(args.rng_seed)
+    limits = httpx.Limits(max_connections=args.diners + args.admins)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            *(diner(client, rec, ids, args, random.Random(rng.random()), deadline) for _ in range(args.diners)),
+            *(admin(client, rec, ids, args, random.Random(rng.random()), deadline) for _ in range(args.admins)),
+        )
+        elapsed = time.perf_counter() - start
+    return rec.report(elapsed)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--database-url", default="sqlite:///./bench.db")
+    p.add_argument("--base-url", help="benchmark an already running server instead of starting one")
+    p.add_argument("--no-seed", action="store_true")
+    p.add_argument("--restaurants", type=int, default=5)
+    p.add_argument("--tables", type=int, default=20)
+    p.add_argument("--menu-items", type=int, default=80)
+    p.add_argument("--orders", type=int, default=10000)
+    p.add_argument("--diners", type=int, default=32)
+    p.add_argument("--admins", type=int, default=4)
+    p.add_argument("--polls", type=int, default=3)
+    p.add_argument("--poll-interval", type=float, default=0.5)
+    p.add_argument("--admin-think", type=float, default=0.2)
+    p.add_argument("--duration", type=float, default=30)
+    p.add_argument("--port", type=int, default=8900)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--rng-seed", type=int, default=42)
+    p.add_argument("--output")
+    args = p.parse_args()
+
+    ids = {"restaurants": args.restaurants, "tables": args.tables, "menu_items": args.menu_items}
+    if not args.no_seed:
+        ids = seed(args.database_url, args.restaurants, args.tables, args.menu_items, args.orders)
+
+    proc = None
+    base = args.base_url
+    if not base:
+        base = f"http://127.0.0.1:{args.port}"
+        env = dict(os.environ, DATABASE_URL=args.database_url)
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            env=env,
+        )
+    try:
+        wait_ready(base)
+        result = asyncio.run(run(base, ids, args))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    result["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    out = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
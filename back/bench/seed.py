@@ -0,0 +1,101 @@
+"""
+Synthetic dataset for benchmarks: restaurants, tables, menus, sessions and
+historical orders, bulk-inserted with Core statements.
+
+    python -m bench.seed --database-url sqlite:///./bench.db --restaurants 5 --orders 100000
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+CATEGORIES = ["popular", "starters", "mains", "desserts", "drinks"]
+WORDS = ["spicy", "grilled", "fresh", "crispy", "smoked", "garlic", "lemon", "herb",
+         "tofu", "chicken", "beef", "noodle", "rice", "salad", "soup", "tea"]
+
+
+def seed(database_url: str, restaurants: int = 1, tables: int = 20, menu_items: int = 80,
+         orders: int = 1000, items_per_order: int = 4, rng_seed: int = 42) -> dict:
+    # app.database reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = database_url
+    from app import models, rollups, search
+    from app.database import Base, engine
+
+    rng = random.Random(rng_seed)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(models.Restaurant.__table__.insert(), [
+            {"id": r, "name": f"Restaurant {r}", "owner_name": "Owner",
+             "owner_email": f"owner{r}@bench.local", "created_at": now}
+            for r in range(1, restaurants + 1)
+        ])
+        table_rows, menu_rows = [], []
+        for r in range(1, restaurants + 1):
+            for t in range(1, tables + 1):
+                table_rows.append({"id": (r - 1) * tables + t, "restaurant_id": r,
+                                   "number": str(t), "location": "main"})
+            for m in range(1, menu_items + 1):
+                name = " ".join(rng.sample(WORDS, 2)).title()
+                menu_rows.append({
+                    "id": (r - 1) * menu_items + m, "restaurant_id": r, "name": f"{name} {m}",
+                    "description": " ".join(rng.sample(WORDS, 6)) + " dish",
+                    "price": round(rng.uniform(3, 30), 2),
+                    "category": CATEGORIES[m % len(CATEGORIES)], "available": True,
+                })
+        conn.execute(models.Table.__table__.insert(), table_rows)
+        conn.execute(models.MenuItem.__table__.insert(), menu_rows)
+
+        session_rows, order_rows, line_rows = [], [], []
+        statuses = list(models.OrderStatusEnum)
+        line_id = 0
+        for o in range(1, orders + 1):
+            r = rng.randint(1, restaurants)
+            table_id = (r - 1) * tables + rng.randint(1, tables)
+            created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            session_rows.append({"id": o, "restaurant_id": r, "table_id": table_id,
+                                 "start_time": created, "end_time": created + timedelta(hours=1)})
+            total = 0
+            for _ in range(items_per_order):
+                line_id += 1
+                menu_id = (r - 1) * menu_items + rng.randint(1, menu_items)
+                price = menu_rows[menu_id - 1]["price"]
+                qty = rng.randint(1, 3)
+                total += price * qty
+                line_rows.append({"id": line_id, "order_id": o, "menu_id": menu_id,
+                                  "quantity": qty, "unit_price": price})
+            status = statuses[o % len(statuses)]
+            order_rows.append({"id": o, "restaurant_id": r, "table_id": table_id, "session_id": o,
+                               "status": status.name, "total_amount": round(total * 1.1, 2),
+                               "created_at": created,
+                               "paid_at": created if status == models.OrderStatusEnum.paid else None})
+        for chunk in range(0, len(order_rows), 5000):
+            conn.execute(models.Session.__table__.insert(), session_rows[chunk:chunk + 5000])
+            conn.execute(models.Order.__table__.insert(), order_rows[chunk:chunk + 5000])
+        for chunk in range(0, len(line_rows), 20000):
+            conn.execute(models.OrderItem.__table__.insert(), line_rows[chunk:chunk + 20000])
+        search.install(conn)
+        search.rebuild(conn)
+        for r in range(1, restaurants + 1):
+            rollups.rebuild(conn, r)
+
+    return {"rid": 1, "table": "1", "table_id": 1, "order_id": 1,
+            "restaurants": restaurants, "tables": tables, "menu_items": menu_items}
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--database-url", default="sqlite:///./bench.db")
+    p.add_argument("--restaurants", type=int, default=1)
+    p.add_argument("--tables", type=int, default=20)
+    p.add_argument("--menu-items", type=int, default=80)
+    p.add_argument("--orders", type=int, default=1000)
+    args = p.parse_args()
+    print(json.dumps(seed(args.database_url, args.restaurants, args.tables, args.menu_items, args.orders)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Menu serialization cost per menu size, no database or server involved.
+
+Compares the default path (ORM rows -> MenuItemOut.from_orm -> CategoryOut,
+re-validated against response_model and encoded with the stdlib encoder)
+with the FAST_JSON path (plain dict rows encoded once with orjson).
+
+    python -m bench.serialization --sizes 50,200,1000,5000
+
+Prints one JSON object per menu size with microseconds per response.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from bench.seed import CATEGORIES, WORDS
+
+
+def make_items(n: int, rng: random.Random):
+    from app import models
+
+    return [
+        models.MenuItem(
+            id=i + 1, restaurant_id=1,
+            name=f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i + 1}",
+            description=" ".join(rng.sample(WORDS, 6)) + " dish",
+            price=Decimal(rng.randint(300, 3000)) / 100,
+            category=CATEGORIES[i % len(CATEGORIES)],
+            available=True,
+        )
+        for i in range(n)
+    ]
+
+
+def timed(fn, repeat: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", default="50,200,1000,5000")
+    p.add_argument("--repeat", type=int, default=50)
+    args = p.parse_args()
+
+    from app import crud, fastjson, schemas
+
+    field = create_response_field("response", schemas.MenuOut)
+    loop = asyncio.new_event_loop()
+    rng = random.Random(42)
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        items = make_items(size, rng)
+
+        def default_path():
+            cats = crud.group_by_category(items)
+            content = loop.run_until_complete(serialize_response(field=field, response_content={"categories": cats}))
+            return JSONResponse(content).body
+
+        def fast_path():
+            return fastjson.dumps({"categories": crud.group_rows_by_category(items)})
+
+        assert json.loads(default_path()) == json.loads(fast_path())
+        default_us = timed(default_path, args.repeat)
+        fast_us = timed(fast_path, args.repeat)
+        print(json.dumps({
+            "menu_items": size,
+            "default_us": round(default_us, 1),
+            "fast_us": round(fast_us, 1),
+            "speedup": round(default_us / fast_us, 2),
+            "orjson": fastjson.orjson is not None,
+        }))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Worker startup cost.
+
+Measures, in fresh interpreters against an already migrated database:
+  - import time of app.main
+  - time from launching uvicorn with --workers N until it answers a
+    request
+
+once with AUTO_CREATE_SCHEMA=0 (production: schema owned by migrations)
+and once with AUTO_CREATE_SCHEMA=1 (each worker introspects the catalog).
+
+    python -m bench.startup --database-url sqlite:///./bench.db --workers 4
+    python -m bench.startup --database-url postgresql://user:pw@localhost/bench
+
+Prints one JSON object per mode.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench.seed import seed
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def import_seconds(env: dict, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env,
+                             capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def ready_seconds(env: dict, port: int, workers: int, timeout: float = 60) -> float:
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        deadline = start + timeout
+        while time.perf_counter() < deadline:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/api/restaurants/1/featured", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError("server did not become ready")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--database-url", default="sqlite:///./bench.db")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--port", type=int, default=8901)
+    args = p.parse_args()
+
+    seed(args.database_url, restaurants=1, tables=20, menu_items=80, orders=100)
+
+    for mode in ("0", "1"):
+        env = dict(os.environ, DATABASE_URL=args.database_url, AUTO_CREATE_SCHEMA=mode,
+                   GUEST_PURGE_INTERVAL="0")
+        print(json.dumps({
+            "auto_create_schema": mode == "1",
+            "import_ms": round(1000 * import_seconds(env, args.repeat), 1),
+            "workers": args.workers,
+            "ready_ms": round(1000 * statistics.median(
+                ready_seconds(env, args.port, args.workers) for _ in range(args.repeat)
+            ), 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import itertools
+import os
+import sys
+import tempfile
+
+# app.database reads its configuration at import time
+_tmp = tempfile.mkdtemp(prefix="qr_order_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("GUEST_PURGE_INTERVAL", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app import search
+    from app.database import Base, engine
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        search.install(conn)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    from app.database import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def restaurant(db):
+    from app import models
+    n = next(_ids)
+    r = models.Restaurant(name=f"R{n}", owner_name="o", owner_email=f"owner{n}@test.local")
+    db.add(r)
+    db.flush()
+    db.add(models.Table(restaurant_id=r.id, number="5", location="patio"))
+    for i in range(5):
+        db.add(models.MenuItem(restaurant_id=r.id, name=f"Grilled tofu {i}", description="smoky",
+                               price=10 + i, category="mains", available=True))
+    db.commit()
+    return r.id
+
+
+@pytest.fixture
+def place_order(db, restaurant):
+    """place_order(quantity, ...) orders the restaurant's items through crud.create_order."""
+    from app import crud, models, schemas
+    table = db.query(models.Table).filter(models.Table.restaurant_id == restaurant).one()
+    session = models.Session(restaurant_id=restaurant, table_id=table.id)
+    db.add(session)
+    db.commit()
+    items = [i.id for i in db.query(models.MenuItem).filter(models.MenuItem.restaurant_id == restaurant)
+             .order_by(models.MenuItem.id)]
+
+    def place(*quantities: int) -> int:
+        lines = [{"item_id": item, "quantity": q} for item, q in zip(items, quantities) if q]
+        return crud.create_order(db, schemas.CreateOrderIn(
+            restaurant_id=restaurant, table_id=table.id, session_id=session.id, items=lines,
+        )).order_id
+    return place
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import archive, crud, models
+
+Status = models.OrderStatusEnum
+
+
+def hot(db, model, *ids):
+    return {row.id for row in db.query(model).filter(model.id.in_(ids))}
+
+
+def test_run_archives_closed_orders_and_ended_sessions(db, restaurant, place_order):
+    paid, cancelled, pending, newest = place_order(1, 2), place_order(0, 3), place_order(2), place_order(1)
+    for oid, status in ((paid, Status.paid), (cancelled, Status.cancelled), (newest, Status.paid)):
+        crud.change_order_status(db, oid, status)
+    table = db.get(models.Order, paid).table_id
+    busy = db.get(models.Session, db.get(models.Order, pending).session_id)
+    idle = models.Session(restaurant_id=restaurant, table_id=table)
+    last = models.Session(restaurant_id=restaurant, table_id=table)
+    db.add_all([idle, last])
+    db.flush()
+    for s in (busy, idle, last):
+        s.end_time = datetime.utcnow() - timedelta(minutes=1)
+    db.commit()
+    busy, idle, last = busy.id, idle.id, last.id
+
+    moved = archive.run(older_than_days=-1)
+    db.expire_all()
+    assert moved["orders"] >= 2 and moved["sessions"] >= 1
+    # Open orders stay, and SQLite keeps the newest row so its id is never reused
+    assert hot(db, models.Order, paid, cancelled, pending, newest) == {pending, newest}
+    assert hot(db, models.OrderArchive, paid, cancelled, pending, newest) == {paid, cancelled}
+    assert not db.query(models.OrderItem).filter(models.OrderItem.order_id.in_([paid, cancelled])).count()
+    assert len(db.get(models.OrderArchive, paid).items) == 2
+    # A session with hot orders left is kept until they are archived too
+    assert hot(db, models.Session, busy, idle, last) == {busy, last}
+    assert hot(db, models.SessionArchive, busy, idle, last) == {idle}
+
+    # Archived orders stay readable by id
+    assert crud.get_order(db, paid).status == Status.paid
+    from app.main import app
+    client = TestClient(app)
+    r = client.get(f"/api/admin/archive/orders/{paid}")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["order_id"] == paid and body["status"] == "paid" and len(body["items"]) == 2
+    assert client.get(f"/api/admin/archive/orders/{pending}").status_code == 404
+
+
+def test_archive_rolls_back_when_counts_disagree(db, restaurant, place_order, monkeypatch):
+    closed, _ = place_order(1), place_order(1)
+    crud.change_order_status(db, closed, Status.paid)
+    copy = archive._copy
+
+    def miscounted(db, source, where, archived_at):
+        # As if a concurrent write slipped a row in between copy and delete
+        return copy(db, source, where, archived_at) + (source is archive.orders)
+    monkeypatch.setattr(archive, "_copy", miscounted)
+
+    assert archive.archive_orders(db, datetime.utcnow() + timedelta(days=1)) == 0
+    db.expire_all()
+    assert hot(db, models.Order, closed) == {closed}
+    assert db.query(models.OrderItem).filter_by(order_id=closed).count() == 1
+    assert not hot(db, models.OrderArchive, closed)
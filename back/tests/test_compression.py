@@ -0,0 +1,44 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware
+from app.etag import encoded_etag, etag_for_bytes, etagged_json
+
+BODY = b'{"items": "' + b"x" * 4096 + b'"}'
+ETAG = etag_for_bytes(BODY)
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware)
+
+
+@app.get("/menu")
+def menu(request: Request):
+    return etagged_json(request, BODY, ETAG)
+
+
+client = TestClient(app)
+
+
+def test_compressed_response_has_its_own_etag():
+    r = client.get("/menu", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["etag"] == encoded_etag(ETAG, "gzip") != ETAG
+    assert r.headers["vary"] == "Accept-Encoding"
+
+
+def test_identity_response_varies_too():
+    r = client.get("/menu", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["etag"] == ETAG
+    assert r.headers["vary"] == "Accept-Encoding"
+
+
+def test_revalidation_keeps_the_encoded_tag():
+    tag = encoded_etag(ETAG, "gzip")
+    r = client.get("/menu", headers={"Accept-Encoding": "gzip", "If-None-Match": tag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == tag
+    assert r.headers["vary"] == "Accept-Encoding"
+    # The identity representation was never sent under the gzip tag
+    r = client.get("/menu", headers={"Accept-Encoding": "identity", "If-None-Match": ETAG})
+    assert r.status_code == 304 and r.headers["etag"] == ETAG
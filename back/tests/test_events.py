@@ -0,0 +1,10 @@
+from app import events
+
+
+def test_publish_failure_is_logged_not_raised(monkeypatch, caplog):
+    def down(*args):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(events.broker, "publish", down)
+    events.publish(["restaurant:1", "order:1"], "order.created", {"order_id": 1})
+    assert caplog.text.count("Failed to publish order.created") == 2
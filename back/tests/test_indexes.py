@@ -0,0 +1,85 @@
+"""
+The hot queries must be served by the indexes added in alembic 0002.
+
+SQLite runs against the test database. Postgres runs when TEST_POSTGRES_URL
+points at a scratch database; seq scans are disabled there because an empty
+table is always cheapest to scan.
+"""
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, desc, select, text
+
+from app import crud, models
+from app.database import Base
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+# name -> (statement, index SQLite picks, index Postgres picks)
+HOT_QUERIES = {
+    "menu": (lambda: crud.menu_rows_stmt(1), "ix_menu_restaurant_available_category",
+             "ix_menu_restaurant_available_category"),
+    "table_by_number": (
+        lambda: select(models.Table).where(models.Table.restaurant_id == 1, models.Table.number == "5"),
+        "ix_tables_restaurant_number", "ix_tables_restaurant_number"),
+    # SQLite prefers the covering composite index, which seeks end_time IS NULL
+    # and yields start_time in order; Postgres takes the smaller partial one
+    "active_session": (lambda: crud.active_session_id_stmt(1),
+                       "ix_sessions_table_end_start", "ix_sessions_active"),
+    "ended_sessions": (
+        lambda: select(models.Session.id).where(
+            models.Session.table_id == 1, models.Session.end_time < datetime(2024, 1, 1)),
+        "ix_sessions_table_end_start", "ix_sessions_table_end_start"),
+    "orders_by_status": (
+        lambda: (
+            select(models.Order.id)
+            .where(models.Order.restaurant_id == 1,
+                   models.Order.status == models.OrderStatusEnum.pending)
+            .order_by(desc(models.Order.created_at)).limit(20)),
+        "ix_orders_restaurant_status_created", "ix_orders_restaurant_status_created"),
+    "orders_keyset_page": (
+        lambda: (
+            select(models.Order.id)
+            .where(models.Order.restaurant_id == 1, models.Order.created_at < datetime(2024, 1, 1))
+            .order_by(desc(models.Order.created_at), desc(models.Order.id)).limit(20)),
+        "ix_orders_restaurant_created", "ix_orders_restaurant_created"),
+}
+
+# Paged and LIMIT 1 reads whose ORDER BY must come from the index, not a sort
+ORDERED_BY_INDEX = {"active_session", "orders_by_status", "orders_keyset_page"}
+
+
+def _sql(stmt, dialect) -> str:
+    return str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+@pytest.mark.parametrize("query", sorted(HOT_QUERIES))
+def test_sqlite_plan_uses_index(engine, query):
+    stmt, index, _ = HOT_QUERIES[query]
+    with engine.connect() as conn:
+        rows = conn.execute(text("EXPLAIN QUERY PLAN " + _sql(stmt(), conn.dialect)))
+        plan = "\n".join(row[-1] for row in rows)
+    assert index in plan, plan
+    if query in ORDERED_BY_INDEX:
+        assert "TEMP B-TREE" not in plan, plan
+
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    pg = create_engine(TEST_POSTGRES_URL)
+    Base.metadata.create_all(bind=pg)
+    yield pg
+    pg.dispose()
+
+
+@pytest.mark.parametrize("query", sorted(HOT_QUERIES))
+def test_postgres_plan_uses_index(pg_engine, query):
+    stmt, _, index = HOT_QUERIES[query]
+    with pg_engine.begin() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = conn.execute(text("EXPLAIN " + _sql(stmt(), conn.dialect)))
+        plan = "\n".join(row[0] for row in rows)
+    assert index in plan, plan
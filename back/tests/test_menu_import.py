@@ -0,0 +1,29 @@
+from app import crud, models
+
+
+def test_import_validates_before_writing(db, restaurant, monkeypatch):
+    monkeypatch.setattr(crud, "MENU_IMPORT_BATCH", 1)
+
+    def rows():
+        # Nothing is written, so no write lock is held, while the client uploads
+        yield 1, {"name": "Grilled tofu 0", "price": 12, "category": "mains"}
+        assert not db.info.get("write_lock")
+        yield 2, {"name": "Miso soup", "price": 4, "category": "starters"}
+        assert not db.info.get("write_lock")
+        yield 3, {"id": 99999, "name": "Ghost", "price": 1, "category": "mains"}
+        yield 4, ValueError("Invalid JSON")
+
+    out = crud.import_menu_items(db, restaurant, rows())
+    assert (out.inserted, out.updated, out.failed, out.committed) == (1, 1, 2, True)
+    assert [e.line for e in out.errors] == [3, 4]
+    names = {i.name for i in crud.get_menu_items(db, restaurant)}
+    assert "Miso soup" in names
+
+
+def test_atomic_import_writes_nothing_on_error(db, restaurant):
+    rows = [(1, {"name": "Miso soup", "price": 4, "category": "starters"}),
+            (2, {"id": 99999, "name": "Ghost", "price": 1, "category": "mains"})]
+    out = crud.import_menu_items(db, restaurant, iter(rows), atomic=True)
+    assert not out.committed and out.failed == 1
+    assert not db.query(models.MenuItem).filter(models.MenuItem.restaurant_id == restaurant,
+                                                 models.MenuItem.name == "Miso soup").count()
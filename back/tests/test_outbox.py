@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app import outbox
+
+BACK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_empty_poll_does_not_take_write_lock(db):
+    assert outbox.claim(db) == []
+    assert not db.info.get("write_lock")
+
+
+def test_only_handled_topics_are_written(monkeypatch):
+    monkeypatch.setattr(outbox, "_handlers", {})
+    assert not outbox.has_handlers()
+    assert not outbox.handles("order.created")
+    outbox.handler("order.created")(lambda topic, payload: None)
+    assert outbox.handles("order.created") and not outbox.handles("order.status_changed")
+    outbox.handler("*")(lambda topic, payload: None)
+    assert outbox.handles("order.status_changed")
+
+
+def test_idle_worker_backs_off():
+    waits = [outbox.OutboxWorker._idle_wait(i) for i in range(20)]
+    assert waits == sorted(waits)
+    assert waits[0] == outbox.OUTBOX_POLL_INTERVAL
+    assert waits[-1] == outbox.OUTBOX_MAX_POLL_INTERVAL
+
+
+def test_standalone_worker_runs_registered_handlers(engine):
+    # python -m app.outbox_worker must see handlers registered on app.outbox
+    env = dict(os.environ, OUTBOX_WEBHOOK_URL="http://127.0.0.1:9/hook")
+    with pytest.raises(subprocess.TimeoutExpired):
+        subprocess.run([sys.executable, "-m", "app.outbox_worker"], cwd=BACK, env=env,
+                       capture_output=True, timeout=3)
+    env.pop("OUTBOX_WEBHOOK_URL")
+    r = subprocess.run([sys.executable, "-m", "app.outbox_worker"], cwd=BACK, env=env,
+                       capture_output=True, text=True, timeout=30)
+    assert r.returncode == 1 and "No outbox handlers" in r.stderr
+
+
+def test_order_events_survive_a_broker_outage(db, restaurant, monkeypatch):
+    from app import crud, events, models, outbox_handlers, schemas
+
+    published = []
+
+    class Broker:
+        down = True
+
+        def publish(self, channel, type, data):
+            if self.down:
+                raise ConnectionError("broker down")
+            published.append((channel, type, data))
+
+    broker = Broker()
+    monkeypatch.setattr(events, "broker", broker)
+    monkeypatch.setattr(events, "PUBLISH_VIA_OUTBOX", True)
+    monkeypatch.setattr(outbox, "_handlers", {})
+    monkeypatch.setattr(outbox, "backoff", lambda attempts: 0)
+    outbox.handler("order.created", "order.status_changed")(outbox_handlers.publish_order_event)
+
+    table = db.query(models.Table).filter(models.Table.restaurant_id == restaurant).one()
+    session = models.Session(restaurant_id=restaurant, table_id=table.id)
+    db.add(session)
+    db.commit()
+    item = db.query(models.MenuItem).filter(models.MenuItem.restaurant_id == restaurant).first()
+    order = crud.create_order(db, schemas.CreateOrderIn(
+        restaurant_id=restaurant, table_id=table.id, session_id=session.id,
+        items=[{"item_id": item.id, "quantity": 1}],
+    ))
+    assert published == []  # nothing inline; the commit carried the event
+    assert outbox.drain() == 1 and published == []  # failed, kept for retry
+
+    broker.down = False
+    assert outbox.drain() == 1
+    channel, type, data = published.pop()
+    assert (channel, type) == (events.restaurant_channel(restaurant), "order.created")
+    assert data["order_id"] == order.order_id and "restaurant_id" not in data
+
+    crud.change_order_status(db, order.order_id, models.OrderStatusEnum.preparing)
+    assert outbox.drain() == 1
+    assert [c for c, _, _ in published] == [events.restaurant_channel(restaurant),
+                                            events.order_channel(order.order_id)]
@@ -0,0 +1,188 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, gateway, models, schemas
+from app.routers import payment as payment_routes
+from bench import fake_gateway
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def order(db, restaurant):
+    table = db.query(models.Table).filter(models.Table.restaurant_id == restaurant).one()
+    session = models.Session(restaurant_id=restaurant, table_id=table.id)
+    db.add(session)
+    db.flush()
+    o = models.Order(restaurant_id=restaurant, table_id=table.id, session_id=session.id,
+                     total_amount=20)
+    db.add(o)
+    db.commit()
+    return o.id
+
+
+def pay(db, order, amount):
+    return crud.create_payment(db, schemas.CreatePaymentIn(order_id=order, payment_method="card",
+                                                           amount=amount))
+
+
+def intent(db, order, amount, intent_id):
+    payment = pay(db, order, amount)
+    crud.attach_payment_intent(db, payment.id, intent_id)
+    return payment
+
+
+def order_status(db, order):
+    db.expire_all()
+    return db.get(models.Order, order).status
+
+
+# --- Balance ---
+def test_pending_payments_count_against_balance(db, order):
+    pay(db, order, 15)
+    with pytest.raises(ValueError, match="pending"):
+        pay(db, order, 10)
+    assert pay(db, order, 5).status == gateway.PENDING
+
+
+def test_failed_payment_frees_balance(db, order):
+    first = pay(db, order, 20)
+    crud.fail_payment(db, first.id)
+    assert pay(db, order, 20).amount == 20
+
+
+def test_orphaned_pending_payment_expires(db, order):
+    # Never got an intent: the process died before attach_payment_intent
+    orphan = pay(db, order, 20)
+    with pytest.raises(ValueError):
+        pay(db, order, 20)
+    orphan.created_at = datetime.utcnow() - timedelta(seconds=crud.PAYMENT_ATTACH_GRACE + 1)
+    db.commit()
+    assert pay(db, order, 20).amount == 20
+
+
+def test_locking_read_takes_write_lock(db, order):
+    crud._open_order(db, order, lock=True)
+    assert db.info.get("write_lock")
+    db.rollback()
+
+
+# --- Provider verdicts ---
+def test_confirm_payment(db, order):
+    intent(db, order, 12, "pi_a")
+    intent(db, order, 8, "pi_b")
+    assert crud.confirm_payment(db, "pi_unknown", gateway.SUCCEEDED) is None
+
+    assert crud.confirm_payment(db, "pi_a", gateway.FAILED) == gateway.FAILED
+    assert crud.confirm_payment(db, "pi_a", gateway.FAILED) == gateway.FAILED  # replay
+    # A retried card succeeds after a decline
+    assert crud.confirm_payment(db, "pi_a", gateway.SUCCEEDED) == gateway.SUCCEEDED
+    assert order_status(db, order) == models.OrderStatusEnum.pending
+
+    assert crud.confirm_payment(db, "pi_b", gateway.SUCCEEDED) == gateway.SUCCEEDED
+    assert order_status(db, order) == models.OrderStatusEnum.paid
+    # Late or replayed notifications never undo a success
+    assert crud.confirm_payment(db, "pi_b", gateway.FAILED) == gateway.SUCCEEDED
+    assert crud.amount_paid(db, order) == 20
+
+
+# --- HTTP, against the fake provider ---
+@pytest.fixture
+def client(monkeypatch):
+    from app.main import app
+
+    provider = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_gateway.app),
+                                 base_url="http://gateway.test")
+    monkeypatch.setattr(gateway.gateway, "_get_client", lambda: provider)
+    monkeypatch.setattr(gateway.gateway, "backoff", 0)
+    monkeypatch.setattr(gateway, "PAYMENT_WEBHOOK_SECRET", SECRET)
+    monkeypatch.setattr(payment_routes, "PAYMENT_WEBHOOK_SECRET", SECRET)
+    return TestClient(app), provider
+
+
+def webhook(api, intent, secret=SECRET):
+    body = json.dumps({"type": "payment_intent.succeeded", "data": intent}).encode()
+    return api.post("/api/payments/webhook", content=body,
+                    headers={gateway.SIGNATURE_HEADER: gateway.sign(body, secret)})
+
+
+def test_payment_flow(db, order, client):
+    api, provider = client
+    r = api.post("/api/payments", json={"order_id": order, "payment_method": "card", "amount": 20})
+    assert r.status_code == 200, r.text
+    intent_id = r.json()["payment_intent_id"]
+
+    # Not paid yet: the provider says so, whatever the client claims
+    assert api.post("/api/payments/confirm", json={"payment_intent_id": intent_id}).json()["success"] is False
+    paid = asyncio.run(provider.post(f"/v1/payment_intents/{intent_id}/confirm")).json()
+    out = api.post("/api/payments/confirm", json={"payment_intent_id": intent_id}).json()
+    assert out["success"] is True and out["transaction_id"] == paid["latest_charge"]
+    assert order_status(db, order) == models.OrderStatusEnum.paid
+
+    # The provider's webhook for the same intent is a no-op
+    assert webhook(api, paid).json() == {"received": True}
+    assert api.post("/api/payments", json={"order_id": order, "payment_method": "card",
+                                           "amount": 1}).status_code == 400
+
+
+def test_webhook_marks_order_paid(db, order, client):
+    api, provider = client
+    intent_id = api.post("/api/payments", json={"order_id": order, "payment_method": "card",
+                                                "amount": 20}).json()["payment_intent_id"]
+    paid = asyncio.run(provider.post(f"/v1/payment_intents/{intent_id}/confirm")).json()
+    assert webhook(api, paid, secret="wrong").status_code == 401
+    assert order_status(db, order) == models.OrderStatusEnum.pending
+    assert webhook(api, paid).status_code == 200
+    assert order_status(db, order) == models.OrderStatusEnum.paid
+
+
+def test_webhook_disabled_without_secret(client, monkeypatch):
+    api, _ = client
+    monkeypatch.setattr(gateway, "PAYMENT_WEBHOOK_SECRET", "")
+    monkeypatch.setattr(payment_routes, "PAYMENT_WEBHOOK_SECRET", "")
+    assert webhook(api, {"id": "pi_x", "status": "succeeded"}, secret="").status_code == 503
+    assert not gateway.verify_signature(b"{}", gateway.sign(b"{}", ""))
+
+
+# --- Client retries ---
+def run_gateway(responses, retries=2):
+    # Each response is a status code or an exception to raise
+    seen = []
+
+    def handle(request):
+        seen.append(request)
+        r = responses[len(seen) - 1]
+        if isinstance(r, Exception):
+            raise r
+        return httpx.Response(r, json={"id": "pi_1", "client_secret": "s"})
+
+    gw = gateway.PaymentGateway(retries=retries, backoff=0)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle), base_url="http://gateway.test")
+    gw._get_client = lambda: client
+    try:
+        result = asyncio.run(gw.create_intent(5, "usd", idempotency_key="payment-1", metadata={}))
+    except gateway.GatewayError as e:
+        result = e
+    return gw, seen, result
+
+
+def test_retries_transient_failures():
+    gw, seen, result = run_gateway([429, httpx.ConnectError("reset"), 503])
+    assert isinstance(result, gateway.GatewayError) and result.status_code == 503
+    assert (gw.requests, gw.retried, gw.failures) == (3, 2, 1)
+
+    gw, seen, result = run_gateway([502, httpx.ReadTimeout("slow"), 200])
+    assert result["id"] == "pi_1"
+    assert gw.retried == 2 and gw.failures == 0
+    # Every attempt reuses the key, so the provider makes one intent
+    assert {r.headers["Idempotency-Key"] for r in seen} == {"payment-1"}
+
+
+def test_client_errors_are_not_retried():
+    gw, seen, result = run_gateway([400, 200])
+    assert result.status_code == 400 and len(seen) == 1
@@ -0,0 +1,38 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models, search
+from app.cache import menu_cache
+from app.metrics import query_budget
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+    return TestClient(app)
+
+
+def test_menu_query_budget(db, restaurant, client):
+    # Enough items that a per-item query would blow the budget
+    for i in range(20):
+        db.add(models.MenuItem(restaurant_id=restaurant, name=f"Dish {i}", price=5,
+                               category=f"cat {i % 4}", available=True))
+    db.commit()
+    menu_cache.bump(restaurant)
+    with query_budget(2):
+        r = client.get(f"/api/restaurants/{restaurant}/menu")
+    assert r.status_code == 200
+    assert sum(len(c["items"]) for c in r.json()["categories"]) == 25
+    with query_budget(0):  # served from the menu cache
+        assert client.get(f"/api/restaurants/{restaurant}/menu").status_code == 200
+    search.get_index(db)  # picks the backend once per process
+    with query_budget(2):  # ranked ids, then the rows
+        r = client.get(f"/api/restaurants/{restaurant}/menu", params={"search": "tofu"})
+    assert len(r.json()["categories"][0]["items"]) == 5
+
+
+def test_query_budget_fails_when_exceeded(restaurant, client):
+    menu_cache.bump(restaurant)
+    with pytest.raises(AssertionError, match="query budget of 0 exceeded"):
+        with query_budget(0):
+            client.get(f"/api/restaurants/{restaurant}/menu")
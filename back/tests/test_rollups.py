@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from app import archive, crud, models, rollups
+
+Status = models.OrderStatusEnum
+
+
+def snapshot(db, restaurant):
+    # Every counter of every rollup row, keyed by primary key
+    out = {}
+    for table in (rollups.sales, rollups.item_sales):
+        key = [c for c in table.primary_key]
+        for row in db.execute(table.select().where(table.c.restaurant_id == restaurant)).mappings():
+            out[(table.name,) + tuple(row[c.name] for c in key)] = {
+                k: v for k, v in row.items() if k not in {c.name for c in key}
+            }
+    return out
+
+
+def day(db, restaurant):
+    return db.query(models.SalesRollup).filter_by(restaurant_id=restaurant, grain=rollups.DAY).one()
+
+
+def test_status_changes_are_reversible(db, restaurant, place_order):
+    paid, cancelled = place_order(2, 1), place_order(0, 3)
+    crud.change_order_status(db, paid, Status.paid)
+    crud.change_order_status(db, cancelled, Status.cancelled)
+    totals = day(db, restaurant)
+    db.refresh(totals)
+    assert (totals.orders, totals.paid_orders, totals.cancelled_orders) == (2, 1, 1)
+    assert totals.revenue == db.get(models.Order, paid).total_amount
+    assert totals.cancelled_amount == db.get(models.Order, cancelled).total_amount
+
+    # Corrections back the amounts out again
+    crud.change_order_status(db, paid, Status.served)
+    crud.change_order_status(db, cancelled, Status.pending)
+    db.refresh(totals)
+    assert (totals.orders, totals.paid_orders, totals.cancelled_orders) == (2, 0, 0)
+    assert totals.revenue == 0 and totals.cancelled_amount == 0
+    items = db.query(models.ItemSalesRollup).filter_by(restaurant_id=restaurant, grain=rollups.DAY).all()
+    assert items and all(i.paid_quantity == i.revenue == i.cancelled_amount == 0 for i in items)
+
+
+def test_rebuild_matches_incremental_rollups(db, restaurant, place_order):
+    orders = [place_order(1, 2), place_order(3), place_order(0, 1, 4), place_order(2, 0, 0, 1),
+              place_order(1, 1, 1, 1, 1), place_order(5)]
+    for oid, status in zip(orders, [Status.paid, Status.paid, Status.cancelled, Status.preparing,
+                                    Status.paid, Status.cancelled]):
+        crud.change_order_status(db, oid, status)
+    # Closed orders move to the archive; rebuild has to read both tables
+    assert archive.archive_orders(db, datetime.utcnow() + timedelta(days=1)) > 0
+    assert db.query(models.OrderArchive).filter_by(restaurant_id=restaurant).count()
+
+    incremental = snapshot(db, restaurant)
+    assert rollups.rebuild(db, restaurant) == len(orders)
+    db.commit()
+    assert snapshot(db, restaurant) == incremental
@@ -0,0 +1,21 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+BACK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEARCH_OBJECTS = "SELECT type, name, sql FROM sqlite_master WHERE name LIKE 'menu_fts%' ORDER BY name"
+
+
+def test_install_matches_migrations(engine, tmp_path):
+    # search.install is the copy; the migrations are what existing databases ran
+    migrated = tmp_path / "migrated.db"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{migrated}")
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACK, env=env,
+                   check=True, capture_output=True)
+    with sqlite3.connect(migrated) as conn:
+        expected = conn.execute(SEARCH_OBJECTS).fetchall()
+    with engine.connect() as conn:
+        installed = [tuple(r) for r in conn.exec_driver_sql(SEARCH_OBJECTS)]
+    assert expected and installed == expected
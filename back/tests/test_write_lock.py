@@ -0,0 +1,19 @@
+from app import models, search
+
+
+def test_search_does_not_take_write_lock(db, restaurant):
+    index = search.get_index(db)
+    assert isinstance(index, search.SqliteFtsIndex)
+    assert index.search(db, restaurant, "tofu")
+    # Typo path runs the vocab query as well
+    index.search(db, restaurant, "tofo")
+    assert not db.info.get("write_lock")
+
+
+def test_dml_takes_write_lock(db, restaurant):
+    db.query(models.MenuItem).filter(models.MenuItem.restaurant_id == restaurant).update(
+        {models.MenuItem.available: False}, synchronize_session=False
+    )
+    assert db.info.get("write_lock")
+    db.rollback()
+    assert not db.info.get("write_lock")